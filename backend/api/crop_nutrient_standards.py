@@ -6,6 +6,12 @@ All values in kg/ha unless specified otherwise.
 Note: These are AVAILABLE nutrient levels in soil, not fertilizer application rates.
 """
 
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
 # Soil nutrient availability thresholds (kg/ha)
 # Based on Soil Health Card interpretations and ICAR guidelines
 
@@ -96,6 +102,31 @@ DEFAULT_REQUIREMENTS = {
     }
 }
 
+# Numeric thresholds as a flat record, so checks use attribute access instead
+# of repeated dict/tuple indexing.
+Thresholds = namedtuple("Thresholds", "n_min p_min k_min ph_lo ph_hi moisture_min description sources")
+
+def _to_thresholds(req) -> Thresholds:
+    return Thresholds(
+        req["n_min"], req["p_min"], req["k_min"], req["ph_range"][0], req["ph_range"][1],
+        req["moisture_min"], req["description"], tuple(req["sources"])
+    )
+
+# Flat (crop, stage) -> (requirements, thresholds) lookup, built once at import.
+# Requirement leaves are read-only views so callers can safely share the references.
+_DEFAULT_REQS = MappingProxyType(DEFAULT_REQUIREMENTS["default"])
+_DEFAULT_ENTRY = (_DEFAULT_REQS, _to_thresholds(_DEFAULT_REQS))
+_FLAT_REQS = {
+    (crop, stage): (MappingProxyType(reqs), _to_thresholds(reqs))
+    for crop, stages in CROP_NUTRIENT_REQUIREMENTS.items()
+    for stage, reqs in stages.items()
+}
+# Fallback to vegetative if the stage is not found
+_CROP_VEG = {
+    crop: _FLAT_REQS.get((crop, "vegetative"), _DEFAULT_ENTRY)
+    for crop in CROP_NUTRIENT_REQUIREMENTS
+}
+
 def get_crop_requirements(crop: str, growth_stage: str = "vegetative") -> dict:
     """
     Get nutrient requirements for a specific crop and growth stage.
@@ -105,25 +136,94 @@ def get_crop_requirements(crop: str, growth_stage: str = "vegetative") -> dict:
         growth_stage: Growth stage (vegetative, flowering, default)
     
     Returns:
-        Dictionary with n_min, p_min, k_min, ph_range, moisture_min, description, sources
+        Read-only mapping with n_min, p_min, k_min, ph_range, moisture_min, description, sources
     """
-    crop = crop.lower()
-    stage = growth_stage.lower()
-    
-    if crop in CROP_NUTRIENT_REQUIREMENTS:
-        if stage in CROP_NUTRIENT_REQUIREMENTS[crop]:
-            return CROP_NUTRIENT_REQUIREMENTS[crop][stage]
+    return _get_req_cached(crop.lower(), growth_stage.lower())[0]
+
+def get_crop_thresholds(crop: str, growth_stage: str = "vegetative") -> Thresholds:
+    """Same lookup as get_crop_requirements, as a Thresholds namedtuple."""
+    return _get_req_cached(crop.lower(), growth_stage.lower())[1]
+
+@lru_cache(maxsize=64)
+def _get_req_cached(crop: str, stage: str):
+    # Unknown crop, use default
+    return _FLAT_REQS.get((crop, stage)) or _CROP_VEG.get(crop, _DEFAULT_ENTRY)
+
+def _deficiencies(t: Thresholds, n, p, k, ph, moisture) -> list:
+    """Messages for every check one reading fails; shared by the scalar and batch checks."""
+    msgs = []
+    if not n >= t.n_min:
+        msgs.append(f"Nitrogen is low ({n:.0f} vs {t.n_min} kg/ha)")
+    if not p >= t.p_min:
+        msgs.append(f"Phosphorus is low ({p:.0f} vs {t.p_min} kg/ha)")
+    if not k >= t.k_min:
+        msgs.append(f"Potassium is low ({k:.0f} vs {t.k_min} kg/ha)")
+    if not t.ph_lo <= ph <= t.ph_hi:
+        if ph < t.ph_lo:
+            msgs.append(f"Soil is too acidic (pH {ph:.1f})")
         else:
-            # Fallback to vegetative if stage not found
-            return CROP_NUTRIENT_REQUIREMENTS[crop].get("vegetative", DEFAULT_REQUIREMENTS["default"])
-    else:
-        # Unknown crop, use default
-        return DEFAULT_REQUIREMENTS["default"]
+            msgs.append(f"Soil is too alkaline (pH {ph:.1f})")
+    if not moisture >= t.moisture_min:
+        msgs.append(f"Soil moisture is low ({moisture:.0f}%)")
+    return msgs
+
+def check_nutrient_adequacy_batch(crop: str, growth_stage: str, n, p, k, ph, moisture) -> dict:
+    """
+    Vectorized check_nutrient_adequacy for many readings of one crop/stage.
+    
+    Inputs are array-likes of equal length (one entry per field/reading).
+    
+    Returns:
+        {
+            "n_adequate": bool ndarray,
+            "p_adequate": bool ndarray,
+            "k_adequate": bool ndarray,
+            "ph_adequate": bool ndarray,
+            "moisture_adequate": bool ndarray,
+            "all_adequate": bool ndarray,
+            "deficiencies": list (per row) of list of str,
+            "requirements": dict (the thresholds used)
+        }
+    """
+    req, t = _get_req_cached(crop.lower(), growth_stage.lower())
+    n = np.asarray(n, dtype=float)
+    p = np.asarray(p, dtype=float)
+    k = np.asarray(k, dtype=float)
+    ph = np.asarray(ph, dtype=float)
+    moisture = np.asarray(moisture, dtype=float)
+    
+    n_adequate = n >= t.n_min
+    p_adequate = p >= t.p_min
+    k_adequate = k >= t.k_min
+    ph_adequate = (ph >= t.ph_lo) & (ph <= t.ph_hi)
+    moisture_adequate = moisture >= t.moisture_min
+    all_adequate = np.logical_and.reduce(
+        (n_adequate, p_adequate, k_adequate, ph_adequate, moisture_adequate)
+    )
+    
+    # Only format messages for the rows that actually fail a check
+    deficiencies = [[] for _ in range(all_adequate.size)]
+    for i in np.flatnonzero(~all_adequate):
+        deficiencies[i] = _deficiencies(t, n[i], p[i], k[i], ph[i], moisture[i])
+    
+    return {
+        "n_adequate": n_adequate,
+        "p_adequate": p_adequate,
+        "k_adequate": k_adequate,
+        "ph_adequate": ph_adequate,
+        "moisture_adequate": moisture_adequate,
+        "all_adequate": all_adequate,
+        "deficiencies": deficiencies,
+        "requirements": req
+    }
 
 def check_nutrient_adequacy(crop: str, growth_stage: str, n: float, p: float, k: float, ph: float, moisture: float) -> dict:
     """
     Check if soil nutrients are adequate for the crop/stage.
     
+    Plain scalar checks for a single reading; use
+    check_nutrient_adequacy_batch for many readings at once.
+    
     Returns:
         {
             "n_adequate": bool,
@@ -135,28 +235,18 @@ def check_nutrient_adequacy(crop: str, growth_stage: str, n: float, p: float, k:
             "requirements": dict (the thresholds used)
         }
     """
-    req = get_crop_requirements(crop, growth_stage)
+    req, t = _get_req_cached(crop.lower(), growth_stage.lower())
     
-    n_adequate = n >= req["n_min"]
-    p_adequate = p >= req["p_min"]
-    k_adequate = k >= req["k_min"]
-    ph_adequate = req["ph_range"][0] <= ph <= req["ph_range"][1]
-    moisture_adequate = moisture >= req["moisture_min"]
+    n_adequate = n >= t.n_min
+    p_adequate = p >= t.p_min
+    k_adequate = k >= t.k_min
+    ph_adequate = t.ph_lo <= ph <= t.ph_hi
+    moisture_adequate = moisture >= t.moisture_min
     
-    deficiencies = []
-    if not n_adequate:
-        deficiencies.append(f"Nitrogen is low ({n:.0f} vs {req['n_min']} kg/ha)")
-    if not p_adequate:
-        deficiencies.append(f"Phosphorus is low ({p:.0f} vs {req['p_min']} kg/ha)")
-    if not k_adequate:
-        deficiencies.append(f"Potassium is low ({k:.0f} vs {req['k_min']} kg/ha)")
-    if not ph_adequate:
-        if ph < req["ph_range"][0]:
-            deficiencies.append(f"Soil is too acidic (pH {ph:.1f})")
-        else:
-            deficiencies.append(f"Soil is too alkaline (pH {ph:.1f})")
-    if not moisture_adequate:
-        deficiencies.append(f"Soil moisture is low ({moisture:.0f}%)")
+    if n_adequate and p_adequate and k_adequate and ph_adequate and moisture_adequate:
+        deficiencies = []
+    else:
+        deficiencies = _deficiencies(t, n, p, k, ph, moisture)
     
     return {
         "n_adequate": n_adequate,
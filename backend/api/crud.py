@@ -1,75 +1,160 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, aliased, joinedload, make_transient_to_detached
+from sqlalchemy import and_, bindparam, column, desc, func, insert, or_, select, table, text, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from . import models, schemas
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import csv
+import io
+import time
+
+# Batches at or above this size are streamed with PostgreSQL COPY;
+# smaller ones go through a single executemany INSERT.
+COPY_THRESHOLD = 100
+
+# Rows fetched per round trip by streaming readers. These return a lazily
+# iterated result (server-side cursor on Postgres) rather than a list, so
+# callers should iterate once and not rely on truthiness or len().
+STREAM_CHUNK_SIZE = 200
+
+# Largest `limit` the paginated list endpoints accept.
+MAX_PAGE_SIZE = 1000
+
+SENSOR_READING_COLUMNS = ("id", "field_id", "sensor_id", "ts", "moisture", "ph", "n", "p", "k")
+WEATHER_READING_COLUMNS = ("id", "field_id", "ts", "temp_c", "humidity_pct", "rainfall_mm")
+IMAGE_COLUMNS = ("id", "field_id", "ts", "source", "rgb_url", "notes")
+RECOMMENDATION_COLUMNS = ("id", "field_id", "ts", "action_json", "data_completeness", "why_json")
+
+# Column lists for read paths that select plain Row tuples instead of
+# hydrating ORM instances (responses only need the column values).
+_SENSOR_COLS = tuple(getattr(models.SensorReading, c) for c in SENSOR_READING_COLUMNS)
+_WEATHER_COLS = tuple(getattr(models.WeatherReading, c) for c in WEATHER_READING_COLUMNS)
+_IMAGE_COLS = tuple(getattr(models.Image, c) for c in IMAGE_COLUMNS)
+_RECOMMENDATION_COLS = tuple(getattr(models.Recommendation, c) for c in RECOMMENDATION_COLUMNS)
+
+# Short-lived cache of primary-key lookups for rarely-changing rows (fields,
+# farmers), which a single request tends to fetch several times. Entries are
+# column snapshots, not live instances, so nothing is shared across sessions.
+# The 1s TTL bounds staleness for writers that don't invalidate explicitly;
+# code that mutates a row must load it with db.get() rather than through here.
+ENTITY_CACHE_TTL = 1.0
+ENTITY_CACHE_MAX_ENTRIES = 1024
+_entity_cache = {}
+
+def _cached_get(db: Session, model, pk: str):
+    key = (model, pk)
+    hit = _entity_cache.get(key)
+    if hit is not None and hit[1] > time.monotonic():
+        obj = model(**hit[0])
+        make_transient_to_detached(obj)
+        return db.merge(obj, load=False)
+
+    obj = db.get(model, pk)
+    if obj is not None:
+        if key not in _entity_cache and len(_entity_cache) >= ENTITY_CACHE_MAX_ENTRIES:
+            # FIFO eviction: dicts iterate in insertion order
+            _entity_cache.pop(next(iter(_entity_cache)), None)
+        values = {c.key: getattr(obj, c.key) for c in model.__mapper__.column_attrs}
+        _entity_cache[key] = (values, time.monotonic() + ENTITY_CACHE_TTL)
+    return obj
+
+def _invalidate_cached(model, pk: str):
+    _entity_cache.pop((model, pk), None)
 
 # --- Ingestion ---
 
-def create_sensor_reading(db: Session, reading: schemas.SensorReadingCreate):
-    db_reading = models.SensorReading(**reading.model_dump())
-    db.add(db_reading)
+def _insert_returning(db: Session, model, values: dict):
+    """INSERT ... RETURNING in one round trip; the returned row carries defaults and PK."""
+    row = db.execute(insert(model).values(**values).returning(model)).scalar_one()
     db.commit()
-    db.refresh(db_reading)
-    return db_reading
+    return row
+
+def create_sensor_reading(db: Session, reading: schemas.SensorReadingCreate):
+    return _insert_returning(db, models.SensorReading, reading.model_dump())
 
 def create_weather_reading(db: Session, reading: schemas.WeatherReadingCreate):
-    db_reading = models.WeatherReading(**reading.model_dump())
-    db.add(db_reading)
+    return _insert_returning(db, models.WeatherReading, reading.model_dump())
+
+def _supports_copy(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+def _copy_rows(db: Session, table: str, columns: tuple, rows: List[dict]):
+    """Stream rows into `table` with COPY FROM STDIN on the session's connection."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    buf.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+
+def _bulk_insert(db: Session, model, columns: tuple, items: list) -> int:
+    if not items:
+        return 0
+
+    rows = [item.model_dump() for item in items]
+    if len(rows) >= COPY_THRESHOLD and _supports_copy(db):
+        for row in rows:
+            row["id"] = models.generate_uuid()
+        _copy_rows(db, model.__tablename__, columns, rows)
+    else:
+        db.execute(insert(model), rows)
     db.commit()
-    db.refresh(db_reading)
-    return db_reading
+    return len(rows)
+
+def bulk_create_sensor_readings(db: Session, readings: List[schemas.SensorReadingCreate]) -> int:
+    return _bulk_insert(db, models.SensorReading, SENSOR_READING_COLUMNS, readings)
+
+def bulk_create_weather_readings(db: Session, readings: List[schemas.WeatherReadingCreate]) -> int:
+    return _bulk_insert(db, models.WeatherReading, WEATHER_READING_COLUMNS, readings)
+
+def bulk_create_images(db: Session, images: List[schemas.ImageCreate]) -> int:
+    return _bulk_insert(db, models.Image, IMAGE_COLUMNS, images)
 
 def create_image(db: Session, image: schemas.ImageCreate):
-    db_image = models.Image(**image.model_dump())
-    db.add(db_image)
-    db.commit()
-    db.refresh(db_image)
-    return db_image
+    return _insert_returning(db, models.Image, image.model_dump())
 
 def create_recommendation(db: Session, rec_data: dict):
-    db_rec = models.Recommendation(**rec_data)
-    db.add(db_rec)
-    db.commit()
-    db.refresh(db_rec)
-    return db_rec
+    return _insert_returning(db, models.Recommendation, rec_data)
 
 from .services import auth
 
-def create_farmer(db: Session, farmer: schemas.FarmerCreate):
-    hashed_pwd = auth.get_password_hash(farmer.password)
-    db_farmer = models.Farmer(
+def create_farmer(db: Session, farmer: schemas.FarmerCreate, password_hash: str = None):
+    # Callers may hash ahead of time (off the request thread) and pass it in
+    if password_hash is None:
+        password_hash = auth.get_password_hash(farmer.password)
+    return _insert_returning(db, models.Farmer, dict(
         name=farmer.name,
         phone=farmer.phone,
         email=farmer.email,
-        password_hash=hashed_pwd,
+        password_hash=password_hash,
         language=farmer.language
-    )
-    db.add(db_farmer)
-    db.commit()
-    db.refresh(db_farmer)
-    return db_farmer
+    ))
 
 def get_farmer_by_email(db: Session, email: str):
-    return db.query(models.Farmer).filter(models.Farmer.email == email).first()
+    return db.execute(_farmer_by_email_stmt, {"email": email}).scalar_one_or_none()
 
 def get_farmer(db: Session, farmer_id: str):
-    return db.query(models.Farmer).filter(models.Farmer.id == farmer_id).first()
+    return _cached_get(db, models.Farmer, farmer_id)
 
 def create_field(db: Session, field: schemas.FieldCreate):
-    db_field = models.Field(**field.model_dump())
-    db.add(db_field)
-    db.commit()
-    db.refresh(db_field)
-    return db_field
+    return _insert_returning(db, models.Field, field.model_dump())
 
 def get_field(db: Session, field_id: str):
-    return db.query(models.Field).filter(models.Field.id == field_id).first()
+    return _cached_get(db, models.Field, field_id)
 
 def get_fields_by_farmer(db: Session, farmer_id: str):
     return db.query(models.Field).filter(models.Field.farmer_id == farmer_id).all()
 
 def update_field(db: Session, field_id: str, field_update: schemas.FieldUpdate):
-    db_field = get_field(db, field_id)
+    # Load uncached; the cached copy is dropped once the update commits
+    db_field = db.get(models.Field, field_id)
     if not db_field:
         return None
     
@@ -78,86 +163,277 @@ def update_field(db: Session, field_id: str, field_update: schemas.FieldUpdate):
         setattr(db_field, key, value)
     
     db.commit()
-    db.refresh(db_field)
+    _invalidate_cached(models.Field, field_id)
     return db_field
 
 def create_feedback(db: Session, feedback: schemas.FeedbackCreate):
-    db_feedback = models.Feedback(**feedback.model_dump())
-    db.add(db_feedback)
-    db.commit()
-    db.refresh(db_feedback)
-    return db_feedback
+    return _insert_returning(db, models.Feedback, feedback.model_dump())
 
 # --- Browsing ---
 
-def get_recommendations(db: Session, field_id: str, limit: int = 50):
-    return db.query(models.Recommendation)\
-             .filter(models.Recommendation.field_id == field_id)\
-             .order_by(desc(models.Recommendation.ts))\
-             .limit(limit)\
-             .all()
-
-def get_sensor_readings(db: Session, field_id: str, start: datetime, end: datetime, limit: int = 500):
-    return db.query(models.SensorReading)\
-             .filter(models.SensorReading.field_id == field_id)\
-             .filter(models.SensorReading.ts >= start)\
-             .filter(models.SensorReading.ts <= end)\
-             .order_by(desc(models.SensorReading.ts))\
-             .limit(limit)\
-             .all()
-
-def get_weather_readings(db: Session, field_id: str, start: datetime, end: datetime, limit: int = 500):
-    return db.query(models.WeatherReading)\
-             .filter(models.WeatherReading.field_id == field_id)\
-             .filter(models.WeatherReading.ts >= start)\
-             .filter(models.WeatherReading.ts <= end)\
-             .order_by(desc(models.WeatherReading.ts))\
-             .limit(limit)\
-             .all()
+# Hot read statements are built once at import with bound parameters, so each
+# call only binds values and hits SQLAlchemy's compiled-statement cache
+# instead of rebuilding the query and compiling SQL again.
+_fid = bindparam("field_id")
+_SR, _WR, _IMG, _REC = models.SensorReading, models.WeatherReading, models.Image, models.Recommendation
+
+# Paged lists order by (ts, id) so rows sharing a timestamp (batch ingest,
+# repeated forecast fetches) still have a total order to resume from.
+_recommendations_stmt = select(*_RECOMMENDATION_COLS)\
+    .where(_REC.field_id == _fid)\
+    .order_by(desc(_REC.ts), desc(_REC.id))\
+    .limit(bindparam("limit"))
+_sensor_readings_stmt = select(*_SENSOR_COLS)\
+    .where(_SR.field_id == _fid, _SR.ts >= bindparam("start"), _SR.ts <= bindparam("end"))\
+    .order_by(desc(_SR.ts), desc(_SR.id))\
+    .limit(bindparam("limit"))
+_weather_readings_stmt = select(*_WEATHER_COLS)\
+    .where(_WR.field_id == _fid, _WR.ts >= bindparam("start"), _WR.ts <= bindparam("end"))\
+    .order_by(desc(_WR.ts), desc(_WR.id))\
+    .limit(bindparam("limit"))
+
+def _keyset_page(stmt, model):
+    """
+    Keyset pagination: the next page continues strictly after the last
+    (ts, id) seen, which stays an index range scan on (field_id, ts DESC) at
+    any depth.
+    """
+    before = tuple_(
+        bindparam("before_ts", type_=model.ts.type),
+        bindparam("before_id", type_=model.id.type),
+    )
+    return stmt.where(tuple_(model.ts, model.id) < before)
+
+_recommendations_page_stmt = _keyset_page(_recommendations_stmt, _REC)
+_sensor_readings_page_stmt = _keyset_page(_sensor_readings_stmt, _SR)
+_weather_readings_page_stmt = _keyset_page(_weather_readings_stmt, _WR)
+
+# Weather on both sides of now in one round trip, each side with its own
+# LIMIT so a dense forecast can't crowd out the history (or vice versa).
+_weather_forecast_side = select(*_WEATHER_COLS)\
+    .where(_WR.field_id == _fid, _WR.ts > bindparam("now"), _WR.ts <= bindparam("end"))\
+    .order_by(_WR.ts.asc(), _WR.id.asc())\
+    .limit(bindparam("forecast_limit"))\
+    .subquery()
+_weather_history_side = select(*_WEATHER_COLS)\
+    .where(_WR.field_id == _fid, _WR.ts >= bindparam("start"), _WR.ts <= bindparam("now"))\
+    .order_by(desc(_WR.ts), desc(_WR.id))\
+    .limit(bindparam("history_limit"))\
+    .subquery()
+_weather_around_stmt = union_all(select(_weather_forecast_side), select(_weather_history_side))
+_latest_sensor_stmt = select(_SR)\
+    .where(_SR.field_id == _fid)\
+    .order_by(desc(_SR.ts))\
+    .limit(1)
+_latest_weather_stmt = select(_WR)\
+    .where(_WR.field_id == _fid, _WR.ts <= bindparam("now"))\
+    .order_by(desc(_WR.ts))\
+    .limit(1)
+# TimescaleDB deployments (see the weather_timescale_rain_rollup migration)
+# also have an hourly continuous aggregate of rainfall. Whole hours inside the
+# window are read from it; the partial hours at each edge from the raw table.
+_rain_1h = table("weather_rain_1h", column("field_id"), column("bucket"), column("rain_mm"))
+
+def _rain_sum_expr(field_id_expr, rollup: bool):
+    """Scalar SUM(rainfall_mm) over [:start, :end] for one field, raw or via the rollup."""
+    wr = aliased(models.WeatherReading)
+    if not rollup:
+        return func.coalesce(
+            select(func.sum(wr.rainfall_mm))
+            .where(wr.field_id == field_id_expr, wr.ts >= bindparam("start"), wr.ts <= bindparam("end"))
+            .scalar_subquery(), 0.0)
+    return func.coalesce(
+        select(func.sum(_rain_1h.c.rain_mm))
+        .where(_rain_1h.c.field_id == field_id_expr, _rain_1h.c.bucket >= bindparam("head_end"), _rain_1h.c.bucket < bindparam("tail_start"))
+        .scalar_subquery(), 0.0) + func.coalesce(
+        select(func.sum(wr.rainfall_mm))
+        .where(
+            wr.field_id == field_id_expr,
+            or_(
+                and_(wr.ts >= bindparam("start"), wr.ts < bindparam("head_end")),
+                and_(wr.ts >= bindparam("tail_start"), wr.ts <= bindparam("end")),
+            ),
+        )
+        .scalar_subquery(), 0.0)
+
+_rainfall_stmt = select(_rain_sum_expr(_fid, rollup=False))
+_rainfall_rollup_stmt = select(_rain_sum_expr(_fid, rollup=True))
+
+def _snapshot_stmt(rollup: bool):
+    """Field + latest sensor + latest past weather + 24h rainfall in one row.
+
+    The latest rows are joined by primary key through correlated
+    ORDER BY ts DESC LIMIT 1 subqueries, which stays portable (no LATERAL)
+    and walks the (field_id, ts DESC) indexes.
+    """
+    sr, wr = aliased(models.SensorReading), aliased(models.WeatherReading)
+    field = models.Field
+    latest_sr_id = select(sr.id).where(sr.field_id == field.id)\
+        .order_by(desc(sr.ts)).limit(1).scalar_subquery()
+    latest_wr_id = select(wr.id).where(wr.field_id == field.id, wr.ts <= bindparam("end"))\
+        .order_by(desc(wr.ts)).limit(1).scalar_subquery()
+    return select(
+            field,
+            _SR,
+            _WR,
+            _rain_sum_expr(field.id, rollup).label("rainfall_24h"),
+        )\
+        .select_from(field)\
+        .outerjoin(_SR, _SR.id == latest_sr_id)\
+        .outerjoin(_WR, _WR.id == latest_wr_id)\
+        .where(field.id == _fid)
+
+_snapshot_raw_stmt = _snapshot_stmt(rollup=False)
+_snapshot_rollup_stmt = _snapshot_stmt(rollup=True)
+# Change detector for the snapshot: field attributes plus the newest
+# timestamp of each reading type, one index probe apiece. Weather is probed
+# twice: forecast rows sit in the future and would always win a plain max(),
+# hiding newly ingested current readings, so the latest reading up to :now
+# (the snapshot's "current" weather) is tracked separately from the newest
+# forecast row.
+_snapshot_version_stmt = select(
+        models.Field.farmer_id,
+        models.Field.crop,
+        models.Field.growth_stage,
+        models.Field.lat,
+        models.Field.lon,
+        select(func.max(_SR.ts)).where(_SR.field_id == models.Field.id).scalar_subquery(),
+        select(func.max(_WR.ts)).where(_WR.field_id == models.Field.id, _WR.ts <= bindparam("now")).scalar_subquery(),
+        select(func.max(_WR.ts)).where(_WR.field_id == models.Field.id).scalar_subquery(),
+        select(func.max(_IMG.ts)).where(_IMG.field_id == models.Field.id).scalar_subquery(),
+    )\
+    .where(models.Field.id == _fid)
+_forecast_stmt = select(_WR)\
+    .where(_WR.field_id == _fid, _WR.ts > bindparam("start"), _WR.ts <= bindparam("end"))\
+    .order_by(_WR.ts.asc())
+_latest_images_stmt = select(*_IMAGE_COLS)\
+    .where(_IMG.field_id == _fid)\
+    .order_by(desc(_IMG.ts))\
+    .limit(bindparam("limit"))
+_farmer_by_email_stmt = select(models.Farmer)\
+    .where(models.Farmer.email == bindparam("email"))\
+    .limit(1)
+_active_assignment_stmt = select(models.SensorAssignment)\
+    .where(models.SensorAssignment.sensor_id == bindparam("sensor_id"), models.SensorAssignment.active == True)\
+    .limit(1)
+
+_STREAM_OPTIONS = {"stream_results": True, "yield_per": STREAM_CHUNK_SIZE}
+
+# The paged readers take ``before``, the (ts, id) of the last row of the
+# previous page, and return the rows that follow it.
+
+def _page(stmt, page_stmt, params, before: Optional[Tuple[datetime, str]]):
+    if before is None:
+        return stmt, params
+    before_ts, before_id = before
+    return page_stmt, {**params, "before_ts": before_ts, "before_id": before_id}
+
+def get_recommendations(db: Session, field_id: str, limit: int = 50, *, before: Optional[Tuple[datetime, str]] = None):
+    stmt, params = _page(
+        _recommendations_stmt, _recommendations_page_stmt,
+        {"field_id": field_id, "limit": limit}, before,
+    )
+    return db.execute(stmt, params).all()
+
+def get_sensor_readings(db: Session, field_id: str, start: datetime, end: datetime, limit: int = 500, *, before: Optional[Tuple[datetime, str]] = None):
+    stmt, params = _page(
+        _sensor_readings_stmt, _sensor_readings_page_stmt,
+        {"field_id": field_id, "start": start, "end": end, "limit": limit}, before,
+    )
+    return db.execute(stmt, params, execution_options=_STREAM_OPTIONS)
+
+def get_weather_readings(db: Session, field_id: str, start: datetime, end: datetime, limit: int = 500, *, before: Optional[Tuple[datetime, str]] = None):
+    stmt, params = _page(
+        _weather_readings_stmt, _weather_readings_page_stmt,
+        {"field_id": field_id, "start": start, "end": end, "limit": limit}, before,
+    )
+    return db.execute(stmt, params).all()
+
+def get_weather_around(
+    db: Session, field_id: str, now: datetime, start: datetime, end: datetime,
+    *, history_limit: int, forecast_limit: int,
+):
+    """
+    Weather around ``now``: up to ``history_limit`` rows in [start, now],
+    newest-first, and up to ``forecast_limit`` rows in (now, end], oldest-first.
+    """
+    rows = db.execute(_weather_around_stmt, {
+        "field_id": field_id, "now": now, "start": start, "end": end,
+        "history_limit": history_limit, "forecast_limit": forecast_limit,
+    }).all()
+    # UNION ALL doesn't promise to keep each side's order; re-sort the parts
+    history = sorted((r for r in rows if r.ts <= now), key=lambda r: (r.ts, r.id), reverse=True)
+    forecast = sorted((r for r in rows if r.ts > now), key=lambda r: (r.ts, r.id))
+    return history, forecast
 
 # --- Retrieval for Snapshot ---
+# The time-windowed readers accept ``now`` so a caller assembling several of
+# them (or snapshotting many fields) computes the window anchor once.
 
 def get_latest_sensor_reading(db: Session, field_id: str):
-    return db.query(models.SensorReading)\
-             .filter(models.SensorReading.field_id == field_id)\
-             .order_by(desc(models.SensorReading.ts))\
-             .first()
+    return db.execute(_latest_sensor_stmt, {"field_id": field_id}).scalar_one_or_none()
 
-def get_latest_weather_reading(db: Session, field_id: str):
+def get_latest_weather_reading(db: Session, field_id: str, *, now: datetime = None):
     # Only consider past/current weather, not forecast
-    now = datetime.utcnow()
-    return db.query(models.WeatherReading)\
-             .filter(models.WeatherReading.field_id == field_id)\
-             .filter(models.WeatherReading.ts <= now)\
-             .order_by(desc(models.WeatherReading.ts))\
-             .first()
-
-def get_rainfall_24h(db: Session, field_id: str):
-    now = datetime.utcnow()
+    now = now or datetime.utcnow()
+    return db.execute(_latest_weather_stmt, {"field_id": field_id, "now": now}).scalar_one_or_none()
+
+_rain_rollup_available = {}
+
+def _has_rain_rollup(db: Session) -> bool:
+    """Whether the hourly rainfall continuous aggregate exists (checked once per engine)."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    if bind.url not in _rain_rollup_available:
+        _rain_rollup_available[bind.url] = db.execute(
+            text("SELECT to_regclass('weather_rain_1h') IS NOT NULL")
+        ).scalar()
+    return _rain_rollup_available[bind.url]
+
+def _rain_params(db: Session, field_id: str, now: datetime):
+    """Bind values for the 24h rainfall window ending at ``now``."""
     past_24h = now - timedelta(hours=24)
-    readings = db.query(models.WeatherReading)\
-                 .filter(models.WeatherReading.field_id == field_id)\
-                 .filter(models.WeatherReading.ts >= past_24h)\
-                 .filter(models.WeatherReading.ts <= now)\
-                 .all()
-    return sum(r.rainfall_mm for r in readings)
-
-def get_forecast_72h(db: Session, field_id: str):
-    now = datetime.utcnow()
+    params = {"field_id": field_id, "start": past_24h, "end": now}
+    if not _has_rain_rollup(db):
+        return params, False
+
+    head_end = past_24h.replace(minute=0, second=0, microsecond=0)
+    if head_end < past_24h:
+        head_end += timedelta(hours=1)
+    tail_start = now.replace(minute=0, second=0, microsecond=0)
+    params.update(head_end=head_end, tail_start=tail_start)
+    return params, True
+
+def get_rainfall_24h(db: Session, field_id: str, *, now: datetime = None):
+    params, rollup = _rain_params(db, field_id, now or datetime.utcnow())
+    return db.execute(_rainfall_rollup_stmt if rollup else _rainfall_stmt, params).scalar()
+
+def get_field_snapshot_row(db: Session, field_id: str, *, now: datetime = None):
+    """One round trip for (field, latest sensor, latest past weather, rainfall_24h).
+
+    Returns None when the field doesn't exist; the reading slots are None when
+    the field has no data yet.
+    """
+    params, rollup = _rain_params(db, field_id, now or datetime.utcnow())
+    return db.execute(_snapshot_rollup_stmt if rollup else _snapshot_raw_stmt, params).first()
+
+def get_field_snapshot_version(db: Session, field_id: str, *, now: datetime = None):
+    """Cheap fingerprint row for conditional snapshot requests; None if no field."""
+    params = {"field_id": field_id, "now": now or datetime.utcnow()}
+    return db.execute(_snapshot_version_stmt, params).first()
+
+def get_forecast_72h(db: Session, field_id: str, *, now: datetime = None):
+    now = now or datetime.utcnow()
     future_72h = now + timedelta(hours=72)
-    return db.query(models.WeatherReading)\
-             .filter(models.WeatherReading.field_id == field_id)\
-             .filter(models.WeatherReading.ts > now)\
-             .filter(models.WeatherReading.ts <= future_72h)\
-             .order_by(models.WeatherReading.ts.asc())\
-             .all()
+    return db.execute(
+        _forecast_stmt,
+        {"field_id": field_id, "start": now, "end": future_72h},
+        execution_options=_STREAM_OPTIONS,
+    ).scalars()
 
 def get_latest_images(db: Session, field_id: str, limit: int = 3):
-    return db.query(models.Image)\
-             .filter(models.Image.field_id == field_id)\
-             .order_by(desc(models.Image.ts))\
-             .limit(limit)\
-             .all()
+    return db.execute(_latest_images_stmt, {"field_id": field_id, "limit": limit}).all()
 
 def delete_image(db: Session, image_id: str):
     """Delete an image by ID"""
@@ -168,65 +444,78 @@ def delete_image(db: Session, image_id: str):
         return True
     return False
 
-def get_field(db: Session, field_id: str):
-    return db.query(models.Field).filter(models.Field.id == field_id).first()
-
 # --- Helper to create farmer/field if needed (for simulator) ---
-def ensure_farmer_field(db: Session, farmer_id: str, field_id: str):
-    farmer = db.query(models.Farmer).filter(models.Farmer.id == farmer_id).first()
-    if not farmer:
-        farmer = models.Farmer(id=farmer_id, name="Simulated Farmer", phone="1234567890")
-        db.add(farmer)
-    
-    field = db.query(models.Field).filter(models.Field.id == field_id).first()
-    if not field:
-        field = models.Field(
-            id=field_id, farmer_id=farmer_id, name="Sim Field", 
+def _insert_ignore(db: Session, model):
+    """INSERT ... ON CONFLICT DO NOTHING for the session's dialect (Postgres or SQLite)."""
+    dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=["id"])
+
+def ensure_farmer_field_bulk(db: Session, pairs):
+    """Create any missing simulated farmers/fields for (farmer_id, field_id) pairs in one commit."""
+    farmer_ids = list(dict.fromkeys(farmer_id for farmer_id, _ in pairs))
+    fields = dict((field_id, farmer_id) for farmer_id, field_id in pairs)
+    if not fields:
+        return
+    db.execute(_insert_ignore(db, models.Farmer), [
+        dict(id=farmer_id, name="Simulated Farmer", phone="1234567890")
+        for farmer_id in farmer_ids
+    ])
+    db.execute(_insert_ignore(db, models.Field), [
+        dict(
+            id=field_id, farmer_id=farmer_id, name="Sim Field",
             crop="wheat", growth_stage="vegetative", lat=20.0, lon=78.0
         )
-        db.add(field)
-    
+        for field_id, farmer_id in fields.items()
+    ])
     db.commit()
-    return field
+
+def ensure_farmer_field(db: Session, farmer_id: str, field_id: str):
+    ensure_farmer_field_bulk(db, [(farmer_id, field_id)])
+    return db.get(models.Field, field_id)
 
 # --- Sensor Management ---
 
 def create_sensor(db: Session, sensor: schemas.SensorCreate):
-    db_sensor = models.Sensor(**sensor.model_dump())
-    db.add(db_sensor)
-    db.commit()
-    db.refresh(db_sensor)
-    return db_sensor
+    return _insert_returning(db, models.Sensor, sensor.model_dump())
 
 def get_sensors(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Sensor).offset(skip).limit(limit).all()
 
 def get_sensor(db: Session, sensor_id: str):
-    return db.query(models.Sensor).filter(models.Sensor.id == sensor_id).first()
+    return db.get(models.Sensor, sensor_id)
+
+# Active assignment and its field come back in the same query (no N+1)
+_sensor_assignment_opts = (
+    joinedload(models.Sensor.active_assignment).joinedload(models.SensorAssignment.field),
+)
+
+def get_sensors_with_assignment(db: Session, skip: int = 0, limit: int = 100):
+    stmt = select(models.Sensor).options(*_sensor_assignment_opts).offset(skip).limit(limit)
+    return db.execute(stmt).unique().scalars().all()
+
+def get_sensor_with_assignment(db: Session, sensor_id: str):
+    return db.get(models.Sensor, sensor_id, options=_sensor_assignment_opts)
 
 def get_active_assignment(db: Session, sensor_id: str):
-    return db.query(models.SensorAssignment)\
-             .filter(models.SensorAssignment.sensor_id == sensor_id)\
-             .filter(models.SensorAssignment.active == True)\
-             .first()
+    return db.execute(_active_assignment_stmt, {"sensor_id": sensor_id}).scalar_one_or_none()
 
 def assign_sensor(db: Session, assignment: schemas.AssignmentCreate):
-    # Deactivate current active assignment if any
-    current = get_active_assignment(db, assignment.sensor_id)
-    if current:
-        current.active = False
-        current.ended_at = datetime.utcnow()
-        db.add(current)
-    
+    # Deactivate current active assignment (if any) in a single UPDATE;
+    # it shares the session transaction with the INSERT below.
+    db.execute(
+        update(models.SensorAssignment)
+        .where(
+            models.SensorAssignment.sensor_id == assignment.sensor_id,
+            models.SensorAssignment.active == True,
+        )
+        .values(active=False, ended_at=models.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
     # Create new assignment
-    new_assignment = models.SensorAssignment(
+    return _insert_returning(db, models.SensorAssignment, dict(
         sensor_id=assignment.sensor_id,
         field_id=assignment.field_id,
         notes=assignment.notes,
         active=True,
-        started_at=datetime.utcnow()
-    )
-    db.add(new_assignment)
-    db.commit()
-    db.refresh(new_assignment)
-    return new_assignment
+    ))
@@ -1,24 +1,33 @@
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import DataError
 from typing import List
 from datetime import datetime, timedelta
 from .services.weather_ml import weather_ml_service
 
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import random
 import time
-import uuid
-import json
+from uuid import uuid4
 import logging
+import orjson
+from pydantic import TypeAdapter
 
 from . import crud, models, schemas, recommendation
+from .reasons import encode_reasons
 from .services import weather as weather_service
 from .services import auth as auth_service
-from .db import engine, get_db
+from .services import tasks
+from .db import SessionLocal, engine, get_db
 
 # Logging Config
 logging.basicConfig(level=logging.INFO)
@@ -35,16 +44,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.exception_handler(DataError)
+async def data_error_handler(request: Request, exc: DataError):
+    # On PostgreSQL ids are native UUIDs, so a malformed id in a path or
+    # payload is rejected by the database; report it as bad input, not a 500.
+    return JSONResponse(status_code=422, content={"detail": "Malformed identifier or value"})
+
+@app.on_event("shutdown")
+def shutdown_task_workers():
+    tasks.shutdown()
+
+@app.on_event("shutdown")
+async def close_weather_client():
+    await weather_service.close_client()
+
+# Read endpoints whose data moves on the order of minutes: clients may reuse
+# a response briefly and revalidate it with If-None-Match afterwards.
+CACHEABLE_PREFIXES = ("/field/", "/fields/", "/weather_readings", "/sensor_readings", "/recommendations")
+CACHE_CONTROL = "private, max-age=30"
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(","))
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+# Registered before observability_middleware so it runs inside it and the
+# request log records the final (possibly 304) status.
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    response = await call_next(request)
+    if request.method != "GET" or not request.url.path.startswith(CACHEABLE_PREFIXES):
+        return response
+    if response.status_code == 200 and "etag" not in response.headers:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = _etag(body)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        response = Response(
+            content=body,
+            status_code=response.status_code,
+            headers=response.headers,
+            background=response.background,
+        )
+        response.headers["ETag"] = etag
+    if response.status_code in (200, 304):
+        response.headers.setdefault("Cache-Control", CACHE_CONTROL)
+    return response
+
+_perf_ns = time.perf_counter_ns
+
 @app.middleware("http")
 async def observability_middleware(request: Request, call_next):
-    request_id = str(uuid.uuid4())
+    request_id = uuid4().hex
     request.state.request_id = request_id
     
-    start_time = time.time()
+    start_ns = _perf_ns()
     response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
+    elapsed_ns = _perf_ns() - start_ns
     
     response.headers["X-Request-Id"] = request_id
     
@@ -53,18 +119,11 @@ async def observability_middleware(request: Request, call_next):
         "method": request.method,
         "path": request.url.path,
         "status_code": response.status_code,
-        "latency_ms": round(process_time, 2)
+        # Integer-truncate to 10us, then scale: 2 decimal places of ms
+        "latency_ms": (elapsed_ns // 10_000) / 100
     }
     
-    # Try to extract field_id from path params if simple
-    # Regex might be safer, but let's just check simple path
-    # e.g., /field/{field_id}/latest
-    path_parts = request.url.path.split('/')
-    if "field" in path_parts and len(path_parts) > path_parts.index("field") + 1:
-        # crude guess, improved if we used Starlette routing args but middleware runs before
-        pass
-    
-    logger.info(json.dumps(log_data))
+    logger.info("%s", orjson.dumps(log_data).decode())
     
     return response
 
@@ -72,30 +131,59 @@ async def observability_middleware(request: Request, call_next):
 def health_check():
     return {"status": "ok"}
 
-@app.get("/ready")
-def readiness_check(db: Session = Depends(get_db)):
+# Probes hit /ready every few seconds per pod; reuse a verdict for this long
+READY_CACHE_TTL = 5.0
+_last_ready_ts = float("-inf")
+_last_ready_ok = False
+
+def _probe_database() -> bool:
     try:
-        db.execute(text("SELECT 1"))
-        return {"status": "ready"}
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Readiness check ok; pool: %s", engine.pool.status())
+        return True
     except Exception as e:
-        logger.error(f"Readiness check failed: {e}")
+        logger.error("Readiness check failed: %s; pool: %s", e, engine.pool.status())
+        return False
+
+@app.get("/ready")
+def readiness_check():
+    global _last_ready_ts, _last_ready_ok
+    now = time.monotonic()
+    if now - _last_ready_ts >= READY_CACHE_TTL:
+        _last_ready_ok = _probe_database()
+        _last_ready_ts = now
+    if not _last_ready_ok:
         raise HTTPException(status_code=503, detail="Database not ready")
+    return {"status": "ready"}
 
 @app.post("/farmers", response_model=schemas.FarmerResponse)
-def create_farmer(farmer: schemas.FarmerCreate, db: Session = Depends(get_db)):
+async def create_farmer(farmer: schemas.FarmerCreate, db: Session = Depends(get_db)):
+    # Argon2 hashing is deliberately slow; run it on a worker thread before
+    # touching the DB so no connection/transaction is held while it runs.
+    password_hash = await asyncio.to_thread(auth_service.get_password_hash, farmer.password)
+
     # Check if email already exists
-    if crud.get_farmer_by_email(db, farmer.email):
+    if await run_in_threadpool(crud.get_farmer_by_email, db, farmer.email):
         raise HTTPException(status_code=400, detail="Email already registered")
         
-    return crud.create_farmer(db, farmer)
+    return await run_in_threadpool(crud.create_farmer, db, farmer, password_hash)
 
 @app.post("/login", response_model=schemas.Token)
-def login(form_data: schemas.LoginRequest, db: Session = Depends(get_db)):
-    farmer = crud.get_farmer_by_email(db, form_data.email)
+async def login(form_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+    farmer = await run_in_threadpool(crud.get_farmer_by_email, db, form_data.email)
     if not farmer:
         raise HTTPException(status_code=404, detail="No account found with this email")
-    if not auth_service.verify_password(form_data.password, farmer.password_hash):
+    # Argon2 verification is deliberately slow; keep it off the event loop
+    verified, new_hash = await asyncio.to_thread(
+        auth_service.verify_and_update_password, form_data.password, farmer.password_hash
+    )
+    if not verified:
         raise HTTPException(status_code=401, detail="Incorrect password")
+    if new_hash:
+        # Stored hash used outdated parameters; upgrade it transparently
+        farmer.password_hash = new_hash
+        await run_in_threadpool(db.commit)
     
     access_token = auth_service.create_access_token(data={"sub": farmer.id})
     return {
@@ -112,7 +200,6 @@ def forgot_password(req: schemas.ForgotPasswordRequest, db: Session = Depends(ge
         raise HTTPException(status_code=404, detail="No account found with this email")
     
     # Generate 6 digit code
-    import random
     code = f"{random.randint(100000, 999999)}"
     
     # Save to DB
@@ -127,8 +214,8 @@ def forgot_password(req: schemas.ForgotPasswordRequest, db: Session = Depends(ge
     return {"message": "Reset code sent to email (check server logs/console)."}
 
 @app.post("/auth/reset-password")
-def reset_password(req: schemas.ResetPasswordRequest, db: Session = Depends(get_db)):
-    farmer = crud.get_farmer_by_email(db, req.email)
+async def reset_password(req: schemas.ResetPasswordRequest, db: Session = Depends(get_db)):
+    farmer = await run_in_threadpool(crud.get_farmer_by_email, db, req.email)
     if not farmer:
         raise HTTPException(status_code=400, detail="Invalid request")
         
@@ -138,12 +225,12 @@ def reset_password(req: schemas.ResetPasswordRequest, db: Session = Depends(get_
     if farmer.reset_expires < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Code expired")
         
-    # Reset Password
-    hashed_pwd = auth_service.get_password_hash(req.new_password)
+    # Reset Password (hash on a worker thread, as in create_farmer)
+    hashed_pwd = await asyncio.to_thread(auth_service.get_password_hash, req.new_password)
     farmer.password_hash = hashed_pwd
     farmer.reset_code = None
     farmer.reset_expires = None
-    db.commit()
+    await run_in_threadpool(db.commit)
     
     return {"message": "Password updated successfully"}
 
@@ -154,6 +241,27 @@ def read_farmer(farmer_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Farmer not found")
     return db_farmer
 
+def _store_weather_readings(readings: List[schemas.WeatherReadingCreate]):
+    # The request-scoped session is closed by now; open a fresh one
+    with SessionLocal() as db:
+        crud.bulk_create_weather_readings(db, readings)
+
+async def _fetch_and_store_weather(field_id: str, lat: float, lon: float):
+    """Background task: pull live weather for a field and store it.
+
+    Runs after the response is sent. The HTTP fetch is awaited on the event
+    loop; the insert runs in the threadpool with its own session instead of
+    the request-scoped one.
+    """
+    try:
+        current, forecast = await weather_service.fetch_live_weather(lat, lon, field_id)
+        # Current + forecast rows go in as one multi-row INSERT (COPY if large)
+        readings = [current, *forecast] if current else forecast
+        if readings:
+            await run_in_threadpool(_store_weather_readings, readings)
+    except Exception as e:
+        logger.error("Weather fetch error for field %s: %s", field_id, e)
+
 @app.post("/fields", response_model=schemas.FieldResponse)
 def create_field(field: schemas.FieldCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     # Check if farmer exists
@@ -162,28 +270,11 @@ def create_field(field: schemas.FieldCreate, background_tasks: BackgroundTasks,
     
     db_field = crud.create_field(db, field)
     
-    # Trigger background weather fetch (sync for now for simplicity)
-    try:
-        current, forecast = weather_service.fetch_live_weather(db_field.lat, db_field.lon, db_field.id)
-        if current:
-            crud.create_weather_reading(db, current)
-        for f in forecast:
-            crud.create_weather_reading(db, f) # Logic in crud might separate forecast? 
-            # Wait, `create_weather_reading` just adds a reading. 
-            # Do we distinguish forecast? The simulator used the same endpoint.
-            # Ideally forecast should be stored differently or with future timestamps.
-            # Our `FieldSnapshot` splits them based on TS comparison.
-            # Crud.get_weather_readings gets historical? 
-            # get_forecast_72h gets future.
-            # So saving them as readings is correct if TS > now.
-            pass
-            
-    except Exception as e:
-        logger.error(f"Weather fetch error: {e}")
-        # Non-blocking, continue
+    # Fetch live weather after the response is sent
+    background_tasks.add_task(_fetch_and_store_weather, db_field.id, db_field.lat, db_field.lon)
         
-    # Trigger Dynamic ML Training
-    background_tasks.add_task(weather_ml_service.train_model_for_field, db_field.id, db_field.lat, db_field.lon)
+    # Trigger Dynamic ML Training in the out-of-process worker
+    tasks.enqueue_training(db_field.id, db_field.lat, db_field.lon)
         
     return db_field
 
@@ -195,21 +286,16 @@ def read_field(field_id: str, db: Session = Depends(get_db)):
     return db_field
 
 @app.put("/fields/{field_id}", response_model=schemas.FieldResponse)
-def update_field(field_id: str, field_update: schemas.FieldUpdate, db: Session = Depends(get_db)):
+def update_field(field_id: str, field_update: schemas.FieldUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_field = crud.update_field(db, field_id, field_update)
     if not db_field:
         raise HTTPException(status_code=404, detail="Field not found")
     
     # If location changed, refresh weather
     if field_update.lat is not None or field_update.lon is not None:
-        try:
-            current, forecast = weather_service.fetch_live_weather(db_field.lat, db_field.lon, db_field.id)
-            if current:
-                crud.create_weather_reading(db, current)
-            for f in forecast:
-                crud.create_weather_reading(db, f)
-        except Exception as e:
-            logger.error(f"Weather fetch error during update: {e}")
+        background_tasks.add_task(_fetch_and_store_weather, db_field.id, db_field.lat, db_field.lon)
+        # The weather model is location-specific; repeated moves coalesce
+        tasks.enqueue_training(db_field.id, db_field.lat, db_field.lon)
 
     return db_field
 
@@ -227,6 +313,12 @@ def ingest_weather(reading: schemas.WeatherReadingCreate, db: Session = Depends(
     crud.create_weather_reading(db, reading)
     return reading
 
+@app.post("/ingest/weather/batch")
+def ingest_weather_batch(readings: List[schemas.WeatherReadingCreate], db: Session = Depends(get_db)):
+    # One multi-row INSERT (COPY for large batches) and one commit
+    inserted = crud.bulk_create_weather_readings(db, readings)
+    return {"inserted": inserted}
+
 @app.post("/ingest/image", response_model=schemas.ImageResponse)
 def ingest_image(image: schemas.ImageCreate, db: Session = Depends(get_db)):
     db_image = crud.create_image(db, image)
@@ -239,25 +331,46 @@ def delete_image(image_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Image not found")
     return {"message": "Image deleted successfully"}
 
+SNAPSHOT_ETAG_WINDOW_S = 30
+
 @app.get("/field/{field_id}/latest", response_model=schemas.FieldSnapshotV1)
-def get_field_snapshot(field_id: str, db: Session = Depends(get_db)):
-    field = crud.get_field(db, field_id)
-    if not field:
+def get_field_snapshot(field_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    # The body embeds snapshot_ts, so hashing it would never match. Fingerprint
+    # the inputs instead, bucketed so time-windowed sums still roll over.
+    now = datetime.utcnow()
+    version = crud.get_field_snapshot_version(db, field_id, now=now)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Field not found")
+    bucket = int(time.time() // SNAPSHOT_ETAG_WINDOW_S)
+    etag = _etag(repr((field_id, tuple(version), bucket)).encode())
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    return _build_field_snapshot(db, field_id, now)
+
+def _build_field_snapshot(db: Session, field_id: str, now: datetime, forecast_rows=None) -> schemas.FieldSnapshotV1:
+    """Assemble the snapshot as of ``now``; ``forecast_rows`` skips the forecast query."""
+    # Field, latest sensor/weather and 24h rainfall come back in one round trip
+    row = crud.get_field_snapshot_row(db, field_id, now=now)
+    if not row:
         raise HTTPException(status_code=404, detail="Field not found")
+    field, sensor, weather, rainfall_24h = row
 
-    sensor = crud.get_latest_sensor_reading(db, field_id)
-    weather = crud.get_latest_weather_reading(db, field_id)
     images = crud.get_latest_images(db, field_id)
-    
-    # Calculate derived weather data
-    rainfall_24h = crud.get_rainfall_24h(db, field_id)
-    forecast = crud.get_forecast_72h(db, field_id)
+    if forecast_rows is None:
+        forecast_rows = crud.get_forecast_72h(db, field_id, now=now)
+    # Forecast rows may be streamed; materialize once so emptiness can be checked
+    forecast_pt_list = [
+        schemas.WeatherPoint(
+            ts=pt.ts, temp_c=pt.temp_c, humidity_pct=pt.humidity_pct, rainfall_mm=pt.rainfall_mm
+        ) for pt in forecast_rows
+    ]
 
     missing_data = []
     if not sensor: missing_data.append("sensor_readings")
     if not weather: missing_data.append("weather")
     if not images: missing_data.append("images")
-    if not forecast: missing_data.append("forecast_72h")
+    if not forecast_pt_list: missing_data.append("forecast_72h")
 
     # Construct sub-objects
     sensor_summary = None
@@ -273,13 +386,6 @@ def get_field_snapshot(field_id: str, db: Session = Depends(get_db)):
 
     weather_summary = None
     if weather:
-        # Convert forecast DB objects to Pydantic models
-        forecast_pt_list = [
-            schemas.WeatherPoint(
-                ts=pt.ts, temp_c=pt.temp_c, humidity_pct=pt.humidity_pct, rainfall_mm=pt.rainfall_mm
-            ) for pt in forecast
-        ] if forecast else []
-        
         weather_summary = schemas.WeatherSummary(
             ts=weather.ts,
             temp_c=weather.temp_c,
@@ -287,7 +393,7 @@ def get_field_snapshot(field_id: str, db: Session = Depends(get_db)):
             rainfall_mm_24h=rainfall_24h,
             forecast_72h=forecast_pt_list
         )
-    elif forecast:
+    elif forecast_pt_list:
          # Edge case: no current weather but has forecast?
          # Contract says weather is nullable. If null, we leave it null.
          pass
@@ -305,7 +411,7 @@ def get_field_snapshot(field_id: str, db: Session = Depends(get_db)):
         crop=field.crop,
         growth_stage=field.growth_stage,
         location=schemas.Location(lat=field.lat, lon=field.lon),
-        snapshot_ts=datetime.utcnow(),
+        snapshot_ts=now,
         sensor_readings=sensor_summary,
         weather=weather_summary,
         images=image_list,
@@ -314,24 +420,42 @@ def get_field_snapshot(field_id: str, db: Session = Depends(get_db)):
     
     return snapshot
 
+LSTM_HISTORY_LIMIT = 100
+
+def _row_to_history_dict(r) -> dict:
+    # Readings only store temp_c, so the LSTM's daily max/min are derived from
+    # it directly rather than probing each row for columns it never has.
+    temp_c = r.temp_c
+    return {"temp_max": temp_c, "temp_min": temp_c - 5, "rain": r.rainfall_mm, "humidity": r.humidity_pct}
+
+# Cap on forecast points fed to the snapshot: hourly data for 72h is 72 rows,
+# so this only bites when repeated fetches have piled up duplicates.
+RECOMMENDATION_FORECAST_LIMIT = 500
+
+def _load_recommendation_context(db: Session, field_id: str):
+    """Snapshot plus LSTM weather history, sharing one weather query.
+
+    The last 7 days and next 72h of weather come back in a single read, each
+    side under its own limit; the future rows feed the snapshot forecast and
+    the past rows the LSTM.
+    """
+    now = datetime.utcnow()
+    history, forecast = crud.get_weather_around(
+        db, field_id, now, now - timedelta(days=7), now + timedelta(hours=72),
+        history_limit=LSTM_HISTORY_LIMIT, forecast_limit=RECOMMENDATION_FORECAST_LIMIT,
+    )
+    return _build_field_snapshot(db, field_id, now, forecast_rows=forecast), history
+
 @app.post("/recommend/{field_id}", response_model=schemas.RecommendationResponse)
 def get_recommendation(field_id: str, db: Session = Depends(get_db)):
-    # Reuse snapshot logic
-    snapshot = get_field_snapshot(field_id, db)
+    snapshot, history = _load_recommendation_context(db, field_id)
     
     # ML Rainfall Prediction (LSTM)
     lstm_forecast = None
     ai_history = None
     try:
-        # Fetch last 7 days weather
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=7)
-        history = crud.get_weather_readings(db, field_id, start_date, end_date, limit=100)
         # Convert to dict list for service
-        history_dicts = [{"temp_max": r.temp_max if hasattr(r, 'temp_max') else r.temp_c, 
-                          "temp_min": r.temp_min if hasattr(r, 'temp_min') else r.temp_c - 5, 
-                          "rain": r.rainfall_mm, 
-                          "humidity": r.humidity_pct} for r in history]
+        history_dicts = [_row_to_history_dict(r) for r in history]
         
         # Extract historical rainfall for visualization (last 7 days)
         ai_history = [d["rain"] for d in history_dicts[-7:]] if len(history_dicts) >= 7 else None
@@ -352,7 +476,7 @@ def get_recommendation(field_id: str, db: Session = Depends(get_db)):
             "fertilizer": rec_response.fertilizer.model_dump()
         },
         "data_completeness": rec_response.data_completeness,
-        "why_json": rec_response.why
+        "why_json": encode_reasons(rec_response._why_codes)
     })
     
     # Update response with ID
@@ -360,35 +484,104 @@ def get_recommendation(field_id: str, db: Session = Depends(get_db)):
     
     return rec_response
 
+@app.get("/rain_forecast", response_model=Dict[str, List[float]])
+def get_rain_forecast(farmer_id: str, db: Session = Depends(get_db)):
+    """Next-3-day LSTM rain forecast for each of a farmer's fields."""
+    now = datetime.utcnow()
+    fields = crud.get_fields_by_farmer(db, farmer_id)
+    histories = [
+        [_row_to_history_dict(r) for r in crud.get_weather_readings(
+            db, f.id, now - timedelta(days=7), now, limit=LSTM_HISTORY_LIMIT
+        )]
+        for f in fields
+    ]
+    # All fields go through the model layer in one call
+    predictions = weather_ml_service.predict_next_3_days_batch([f.id for f in fields], histories)
+    return {f.id: row for f, row in zip(fields, predictions.tolist())}
+
 @app.post("/feedback", response_model=schemas.FeedbackResponse)
 def submit_feedback(feedback: schemas.FeedbackCreate, db: Session = Depends(get_db)):
     return crud.create_feedback(db, feedback)
 
+# List endpoints validate and encode whole pages through one prebuilt adapter
+# each, so the row loop runs inside pydantic-core instead of per-item Python.
+_RECOMMENDATION_LIST_ADAPTER = TypeAdapter(List[schemas.RecommendationHistoryItem])
+_SENSOR_READING_LIST_ADAPTER = TypeAdapter(List[schemas.SensorReadingCreate])
+_WEATHER_READING_LIST_ADAPTER = TypeAdapter(List[schemas.WeatherReadingResponse])
+
+def _json_list(adapter: TypeAdapter, rows) -> Response:
+    items = adapter.validate_python(rows, from_attributes=True)
+    return Response(content=adapter.dump_json(items), media_type="application/json")
+
+def _set_next_cursor(response: Response, rows, limit: int):
+    """
+    A full page means there may be more: hand back its last (ts, id) as the
+    keyset cursor, to be passed as ?cursor= for the next page.
+    """
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = f"{last.ts.isoformat()},{last.id}"
+
+def _parse_cursor(cursor: Optional[str]):
+    """X-Next-Cursor value -> the (ts, id) the next page starts after."""
+    if cursor is None:
+        return None
+    ts, sep, row_id = cursor.partition(",")
+    try:
+        if not (sep and row_id):
+            raise ValueError(cursor)
+        return datetime.fromisoformat(ts), row_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/recommendations", response_model=List[schemas.RecommendationHistoryItem])
-def list_recommendations(field_id: str, limit: int = 50, db: Session = Depends(get_db)):
-    recs = crud.get_recommendations(db, field_id, limit)
-    return recs
+def list_recommendations(
+    field_id: str,
+    limit: int = Query(50, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    recs = crud.get_recommendations(db, field_id, limit, before=_parse_cursor(cursor))
+    response = _json_list(_RECOMMENDATION_LIST_ADAPTER, recs)
+    _set_next_cursor(response, recs, limit)
+    return response
+
+def _reading_window(start: Optional[datetime], end: Optional[datetime]):
+    """Resolve the default last-7-days window at request time."""
+    end = end or datetime.utcnow()
+    return start or end - timedelta(days=7), end
 
 @app.get("/sensor_readings", response_model=List[schemas.SensorReadingCreate]) # SensorReadingCreate has ID? No.
 # We need SensorReadingResponse with ID.
 def list_sensor_readings(
     field_id: str, 
-    start: datetime = datetime.utcnow() - timedelta(days=7), 
-    end: datetime = datetime.utcnow(), 
-    limit: int = 500, 
+    start: Optional[datetime] = None, 
+    end: Optional[datetime] = None, 
+    limit: int = Query(500, ge=1, le=crud.MAX_PAGE_SIZE), 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return crud.get_sensor_readings(db, field_id, start, end, limit)
+    start, end = _reading_window(start, end)
+    # Materialize so the page's last row can go in the cursor header
+    readings = crud.get_sensor_readings(db, field_id, start, end, limit, before=_parse_cursor(cursor)).all()
+    response = _json_list(_SENSOR_READING_LIST_ADAPTER, readings)
+    _set_next_cursor(response, readings, limit)
+    return response
 
 @app.get("/weather_readings", response_model=List[schemas.WeatherReadingResponse])
 def list_weather_readings(
     field_id: str, 
-    start: datetime = datetime.utcnow() - timedelta(days=7), 
-    end: datetime = datetime.utcnow(), 
-    limit: int = 500, 
+    start: Optional[datetime] = None, 
+    end: Optional[datetime] = None, 
+    limit: int = Query(500, ge=1, le=crud.MAX_PAGE_SIZE), 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return crud.get_weather_readings(db, field_id, start, end, limit)
+    start, end = _reading_window(start, end)
+    readings = crud.get_weather_readings(db, field_id, start, end, limit, before=_parse_cursor(cursor))
+    response = _json_list(_WEATHER_READING_LIST_ADAPTER, readings)
+    _set_next_cursor(response, readings, limit)
+    return response
 
 # Helper endpoint to bootstrap data for simulator (optional but helpful)
 @app.post("/admin/create_field")
@@ -402,35 +595,31 @@ def admin_create_field(farmer_id: str, field_id: str, db: Session = Depends(get_
 def create_sensor(sensor: schemas.SensorCreate, db: Session = Depends(get_db)):
     return crud.create_sensor(db, sensor)
 
+def _current_assignment(sensor: models.Sensor):
+    """Build the enriched assignment from the eagerly loaded relationships."""
+    assignment = sensor.active_assignment
+    if not assignment:
+        return None
+    assign_resp = schemas.SensorAssignmentResponse.model_validate(assignment)
+    if assignment.field:
+        assign_resp.field_name = assignment.field.name
+    return assign_resp
+
 @app.get("/sensors", response_model=List[schemas.SensorResponse])
 def list_sensors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    sensors = crud.get_sensors(db, skip, limit)
+    sensors = crud.get_sensors_with_assignment(db, skip, limit)
     # Populate current assignments
     for s in sensors:
-        assignment = crud.get_active_assignment(db, s.id)
-        if assignment:
-            # Enrich with field name
-            field = crud.get_field(db, assignment.field_id)
-            assign_resp = schemas.SensorAssignmentResponse.model_validate(assignment)
-            if field:
-                assign_resp.field_name = field.name
-            s.current_assignment = assign_resp
+        s.current_assignment = _current_assignment(s)
     return sensors
 
 @app.get("/sensors/{sensor_id}", response_model=schemas.SensorResponse)
 def get_sensor(sensor_id: str, db: Session = Depends(get_db)):
-    sensor = crud.get_sensor(db, sensor_id)
+    sensor = crud.get_sensor_with_assignment(db, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
     
-    assignment = crud.get_active_assignment(db, sensor_id)
-    if assignment:
-        field = crud.get_field(db, assignment.field_id)
-        assign_resp = schemas.SensorAssignmentResponse.model_validate(assignment)
-        if field:
-            assign_resp.field_name = field.name
-        sensor.current_assignment = assign_resp
-        
+    sensor.current_assignment = _current_assignment(sensor)
     return sensor
 
 @app.post("/sensors/{sensor_id}/assign", response_model=schemas.SensorAssignmentResponse)
@@ -457,8 +646,6 @@ def simulate_sensor_data(sensor_id: str, db: Session = Depends(get_db)):
     if not assignment:
         raise HTTPException(status_code=400, detail="Sensor not assigned to any field")
         
-    import random
-    
     # Generate random reading
     reading = schemas.SensorReadingCreate(
         field_id=assignment.field_id,
@@ -45,6 +45,38 @@ GENERIC_ALERTS = {
     "wilt": {"issue": "Root Zone Issue", "treatment": "Check drainage and soil moisture.", "severity": "high"}
 }
 
+# Flat (crop_key, keyword, alert) table in priority order; crop_key is None
+# for the generic fallbacks.
+_KEYWORDS = tuple(
+    (crop, kw, data)
+    for crop, alerts in CROP_ALERTS.items()
+    for kw, data in alerts.items()
+) + tuple((None, kw, data) for kw, data in GENERIC_ALERTS.items())
+
+def _build_matcher(crop_key=None):
+    """
+    A crop's (keyword, alert) pairs followed by the generic ones, in table
+    order, so one scan keeps the old crop-then-generic priority.
+    """
+    items = [(kw, data) for c, kw, data in _KEYWORDS if c == crop_key]
+    if crop_key is not None:
+        items += [(kw, data) for c, kw, data in _KEYWORDS if c is None]
+    return tuple(items)
+
+# Substrings of a free-form crop name -> CROP_ALERTS key, checked in order
+_CROP_ALIASES = {
+    "cotton": "cotton",
+    "groundnut": "groundnut",
+    "peanut": "groundnut",
+    "cholam": "cholam",
+    "sorghum": "cholam",
+}
+_ALIAS_ITEMS = tuple(_CROP_ALIASES.items())
+
+# Crop-specific keywords first, then the generic fallback
+_MATCHERS = {crop: _build_matcher(crop) for crop in CROP_ALERTS}
+_GENERIC_MATCHER = _build_matcher()
+
 def analyze_crop_image(image_url: str, notes: str = "", crop_name: str = "paddy") -> dict:
     """
     Simulates a specialized Deep Learning model trained on TNAU crop datasets.
@@ -61,30 +93,20 @@ def analyze_crop_image(image_url: str, notes: str = "", crop_name: str = "paddy"
     # Normalize inputs
     text_cues = (notes + " " + image_url).lower()
     
-    # Normalize crop name to key
+    # Normalize crop name to key (first alias found wins)
+    name = crop_name.lower()
     crop_key = "paddy" # Default
-    if "cotton" in crop_name.lower(): crop_key = "cotton"
-    elif "groundnut" in crop_name.lower() or "peanut" in crop_name.lower(): crop_key = "groundnut"
-    elif "cholam" in crop_name.lower() or "sorghum" in crop_name.lower(): crop_key = "cholam"
-    
-    # Select dictionary
-    knowledge_base = CROP_ALERTS.get(crop_key, GENERIC_ALERTS)
+    for alias, key in _ALIAS_ITEMS:
+        if alias in name:
+            crop_key = key
+            break
     
-    # Search for cues
+    # Priority search over crop-specific cues, falling back to generic ones
     detected = None
-    
-    # Priority search
-    for keyword, data in knowledge_base.items():
+    for keyword, data in _MATCHERS.get(crop_key, _GENERIC_MATCHER):
         if keyword in text_cues:
             detected = data
             break
-            
-    # Fallback to generic if crop-specific search failed but visual cues exist
-    if not detected and crop_key != "generic":
-        for keyword, data in GENERIC_ALERTS.items():
-            if keyword in text_cues:
-                detected = data
-                break
 
     if detected:
         return {
@@ -1,4 +1,3 @@
-import torch
 import torch.nn as nn
 
 class LSTMWeatherModel(nn.Module):
@@ -40,13 +39,11 @@ class LSTMWeatherModel(nn.Module):
         self.relu = nn.ReLU()
 
     def forward(self, x):
-        # Initialize hidden/cell states for Bi-Directional (num_layers * 2)
-        h0 = torch.zeros(self.num_layers * 2, x.size(0), self.hidden_size).to(x.device)
-        c0 = torch.zeros(self.num_layers * 2, x.size(0), self.hidden_size).to(x.device)
-        
         # Forward pass
+        # nn.LSTM zero-initialises h0/c0 on x's device when none are given,
+        # so we avoid allocating and copying them on every call.
         # out shape: (batch, seq, hidden_size * 2)
-        out, _ = self.lstm(x, (h0, c0))
+        out, _ = self.lstm(x)
         
         # Decode the last time step
         # Take the output of the last sequence step
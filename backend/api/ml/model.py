@@ -1,15 +1,25 @@
 import joblib
-import pandas as pd
+import numpy as np
 import os
 import logging
-from typing import Dict, Any
+from typing import List, Sequence
 
 logger = logging.getLogger("api")
 
+# Column order used in training (train_soil_model.py): numeric features, then
+# the sorted pd.get_dummies crop columns Crop_Maize, Crop_Rice, Crop_Wheat.
+FEATURE_COLUMNS = ("N", "P", "K", "pH", "Moisture", "Crop_Maize", "Crop_Rice", "Crop_Wheat")
+NUMERIC_FEATURES = 5
+
 class SoilHealthClassifier:
     def __init__(self):
         self.model = None
         self.blobs = ["Crop_Rice", "Crop_Wheat", "Crop_Maize"]
+        # Crop name -> offset of its one-hot column after the numeric features
+        self._crop_index = {
+            c[len("Crop_"):]: i
+            for i, c in enumerate(FEATURE_COLUMNS[NUMERIC_FEATURES:])
+        }
         self.load_model()
         
     def load_model(self):
@@ -17,7 +27,15 @@ class SoilHealthClassifier:
             # Assume model is in same directory
             model_path = os.path.join(os.path.dirname(__file__), "soil_classifier.joblib")
             if os.path.exists(model_path):
-                self.model = joblib.load(model_path)
+                model = joblib.load(model_path)
+                names = getattr(model, "feature_names_in_", None)
+                if names is not None:
+                    if tuple(names) != FEATURE_COLUMNS:
+                        raise ValueError(f"Unexpected feature columns {list(names)}")
+                    # We predict on plain arrays in FEATURE_COLUMNS order; drop the
+                    # fitted names so sklearn doesn't warn on every call.
+                    del model.feature_names_in_
+                self.model = model
                 logger.info(f"Loaded ML Model from {model_path}")
             else:
                 logger.warning(f"ML Model not found at {model_path}")
@@ -25,41 +43,36 @@ class SoilHealthClassifier:
             logger.error(f"Failed to load ML Model: {e}")
 
     def predict(self, n: float, p: float, k: float, ph: float, moisture: float, crop: str) -> str:
+        return self.predict_batch([(n, p, k, ph, moisture)], [crop])[0]
+
+    def predict_batch(self, X: np.ndarray, crops: Sequence[str]) -> List[str]:
+        """
+        Classify several soil samples in one model call.
+
+        :param X: (B, 5) array of N, P, K, pH, Moisture rows
+        :param crops: crop name for each row
+        """
         if not self.model:
-            return "Model Not Available"
+            return ["Model Not Available"] * len(crops)
             
         try:
-            # Prepare Input DataFrame
-            input_data = {
-                "N": [n],
-                "P": [p],
-                "K": [k],
-                "pH": [ph],
-                "Moisture": [moisture]
-            }
-            
-            # Add one-hot encoded crop columns
-            target_col = f"Crop_{crop}"
-            for c in self.blobs:
-                input_data[c] = [1 if c == target_col else 0]
-                
-            df = pd.DataFrame(input_data)
-            
-            # Enforce column order matching training (N, P, K, pH, Moisture, Crop_Maize, Crop_Rice, Crop_Wheat)
-            # The order in training was: N, P, K, pH, Moisture, Crop_Maize, Crop_Rice, Crop_Wheat (alphabetical? No, get_dummies result)
-            # train_soil_model.py: df.drop(columns=["Status"])
-            # Let's verify exact columns. `pd.get_dummies` creates sorted columns by default.
-            # So Crop_Maize, Crop_Rice, Crop_Wheat.
-            expected_cols = ["N", "P", "K", "pH", "Moisture", "Crop_Maize", "Crop_Rice", "Crop_Wheat"]
-            df = df[expected_cols]
+            # The forest evaluates in float32 anyway, so build the feature
+            # matrix in that dtype and skip sklearn's conversion copy.
+            # Allocated per call so concurrent requests never share a buffer.
+            X = np.asarray(X, dtype=np.float32).reshape(-1, NUMERIC_FEATURES)
+            rows = np.zeros((len(X), len(FEATURE_COLUMNS)), dtype=np.float32)
+            rows[:, :NUMERIC_FEATURES] = X
+            for i, crop in enumerate(crops):
+                idx = self._crop_index.get(crop)
+                if idx is not None:
+                    rows[i, NUMERIC_FEATURES + idx] = 1.0
             
             # Predict
-            prediction = self.model.predict(df)[0]
-            return str(prediction)
+            return [str(prediction) for prediction in self.model.predict(rows)]
             
         except Exception as e:
             logger.error(f"Prediction Error: {e}")
-            return "Analysis Failed"
+            return ["Analysis Failed"] * len(crops)
 
 # Singleton instance
 classifier = SoilHealthClassifier()
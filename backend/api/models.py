@@ -1,16 +1,44 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, JSON, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, JSON, Boolean, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.expression import FunctionElement
 import uuid
-from datetime import datetime
 from .db import Base
 
 def generate_uuid():
     return str(uuid.uuid4())
 
+# Ids are UUID strings in Python everywhere. PostgreSQL stores them natively
+# (16 bytes vs 36 for text, so smaller PK/FK indexes and cheaper joins);
+# other dialects such as the SQLite test/dev DBs keep plain strings.
+UUIDString = String().with_variant(UUID(as_uuid=False), "postgresql")
+
+# Recommendation payloads are stored as binary JSONB on PostgreSQL (no
+# re-parse on read, duplicate keys collapsed); plain JSON elsewhere.
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+class utcnow(FunctionElement):
+    """Current UTC time as a naive timestamp, evaluated by the database.
+
+    Used as a server default so INSERTs don't compute a datetime in Python;
+    the value comes back through INSERT ... RETURNING like any other default.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _utcnow_pg(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
 class Farmer(Base):
     __tablename__ = "farmers"
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
     name = Column(String, index=True)
     phone = Column(String, index=True)
     email = Column(String, unique=True, index=True, nullable=True) # Nullable for migration safety
@@ -18,82 +46,123 @@ class Farmer(Base):
     language = Column(String, default="en")
     reset_code = Column(String, nullable=True)
     reset_expires = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
 
     fields = relationship("Field", back_populates="farmer")
 
 class Field(Base):
     __tablename__ = "fields"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    farmer_id = Column(String, ForeignKey("farmers.id"))
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    farmer_id = Column(UUIDString, ForeignKey("farmers.id"))
     name = Column(String)
     crop = Column(String)
     growth_stage = Column(String)
     lat = Column(Float)
     lon = Column(Float)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
 
     farmer = relationship("Farmer", back_populates="fields")
-    sensor_readings = relationship("SensorReading", back_populates="field")
-    weather_readings = relationship("WeatherReading", back_populates="field")
-    images = relationship("Image", back_populates="field")
-    recommendations = relationship("Recommendation", back_populates="field")
+    # Per-field time series grow without bound, so eager loading them would
+    # drag whole histories into every Field load and lazy loading invites
+    # N+1 loops. They are write-only: read them with bounded queries, e.g.
+    # field.sensor_readings.select().order_by(...).limit(n), or the crud readers.
+    sensor_readings = relationship("SensorReading", back_populates="field", lazy="write_only")
+    weather_readings = relationship("WeatherReading", back_populates="field", lazy="write_only")
+    images = relationship("Image", back_populates="field", lazy="write_only")
+    recommendations = relationship("Recommendation", back_populates="field", lazy="write_only")
 
 class SensorReading(Base):
     __tablename__ = "sensor_readings"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
-    sensor_id = Column(String, ForeignKey("sensors.id"), index=True, nullable=True)
-    ts = Column(DateTime, index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    field_id = Column(UUIDString, ForeignKey("fields.id"))
+    sensor_id = Column(UUIDString, ForeignKey("sensors.id"), index=True, nullable=True)
+    ts = Column(DateTime)
     moisture = Column(Float)
     ph = Column(Float)
     n = Column(Float)
     p = Column(Float)
     k = Column(Float)
 
+    __table_args__ = (
+        # Covering index: the latest-reading and range readers select only
+        # these columns, so Postgres can answer them with an index-only scan.
+        Index(
+            "ix_sensor_readings_field_ts_cover", field_id, ts.desc(),
+            postgresql_include=["id", "sensor_id", "moisture", "ph", "n", "p", "k"],
+        ),
+        # Cross-field time range scans. Readings are appended roughly in ts
+        # order, so a BRIN index (one summary per block range) serves them at a
+        # fraction of a B-tree's size. PostgreSQL only.
+        Index(
+            "ix_sensor_readings_ts_brin", ts,
+            postgresql_using="brin", postgresql_with={"pages_per_range": 32},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     field = relationship("Field", back_populates="sensor_readings")
     sensor = relationship("Sensor")
 
 class WeatherReading(Base):
     __tablename__ = "weather_readings"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
-    ts = Column(DateTime, index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    field_id = Column(UUIDString, ForeignKey("fields.id"))
+    ts = Column(DateTime)
     temp_c = Column(Float)
     humidity_pct = Column(Float)
     rainfall_mm = Column(Float)
 
+    __table_args__ = (
+        # Covering index (see SensorReading): also serves the rainfall SUM
+        Index(
+            "ix_weather_readings_field_ts_cover", field_id, ts.desc(),
+            postgresql_include=["id", "temp_c", "humidity_pct", "rainfall_mm"],
+        ),
+        Index(
+            "ix_weather_readings_ts_brin", ts,
+            postgresql_using="brin", postgresql_with={"pages_per_range": 32},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     field = relationship("Field", back_populates="weather_readings")
 
 class Image(Base):
     __tablename__ = "images"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
-    ts = Column(DateTime, index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    field_id = Column(UUIDString, ForeignKey("fields.id"))
+    ts = Column(DateTime)
     source = Column(String)  # phone, drone
     rgb_url = Column(String)
     notes = Column(String, nullable=True)
 
+    __table_args__ = (
+        Index("ix_images_field_ts", field_id, ts.desc()),
+    )
+
     field = relationship("Field", back_populates="images")
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
-    ts = Column(DateTime, index=True)
-    action_json = Column(JSON)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    field_id = Column(UUIDString, ForeignKey("fields.id"))
+    ts = Column(DateTime)
+    action_json = Column(JSONDocument)
     data_completeness = Column(Float)
-    why_json = Column(JSON)
+    why_json = Column(JSONDocument)
+
+    __table_args__ = (
+        Index("ix_recommendations_field_ts", field_id, ts.desc()),
+    )
 
     field = relationship("Field", back_populates="recommendations")
-    feedback = relationship("Feedback", back_populates="recommendation", uselist=False)
+    # At most one row per recommendation; fetch it in the same query
+    feedback = relationship("Feedback", back_populates="recommendation", uselist=False, lazy="joined")
 
 class Feedback(Base):
     __tablename__ = "feedback"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
-    recommendation_id = Column(String, ForeignKey("recommendations.id"), index=True)
-    ts = Column(DateTime, default=datetime.utcnow)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    field_id = Column(UUIDString, ForeignKey("fields.id"), index=True)
+    recommendation_id = Column(UUIDString, ForeignKey("recommendations.id"), index=True)
+    ts = Column(DateTime, server_default=utcnow())
     followed = Column(Boolean)
     outcome = Column(String)
     notes = Column(String, nullable=True)
@@ -103,26 +172,47 @@ class Feedback(Base):
 
 class Sensor(Base):
     __tablename__ = "sensors"
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
     name = Column(String, index=True)
     type = Column(String) # Soil, Weather, Other
     metrics = Column(String) # JSON or Comma-separated list of metrics
     status = Column(String, default="draft") # draft, active, inactive
     notes = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
 
     assignments = relationship("SensorAssignment", back_populates="sensor")
+    # The single currently-active assignment, for eager loading in listings
+    active_assignment = relationship(
+        "SensorAssignment",
+        primaryjoin="and_(Sensor.id == SensorAssignment.sensor_id, SensorAssignment.active == True)",
+        uselist=False,
+        viewonly=True,
+    )
 
 class SensorAssignment(Base):
     __tablename__ = "sensor_assignments"
-    id = Column(String, primary_key=True, default=generate_uuid)
-    sensor_id = Column(String, ForeignKey("sensors.id"), index=True)
-    field_id = Column(String, ForeignKey("fields.id"), index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    sensor_id = Column(UUIDString, ForeignKey("sensors.id"), index=True)
+    field_id = Column(UUIDString, ForeignKey("fields.id"))
     active = Column(Boolean, default=True)
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, server_default=utcnow())
     ended_at = Column(DateTime, nullable=True)
     notes = Column(String, nullable=True)
 
+    __table_args__ = (
+        # Partial index: get_active_assignment only ever looks up active rows
+        Index(
+            "ix_sensor_assignments_active_sensor", sensor_id,
+            postgresql_where=(active == True), sqlite_where=(active == True),
+        ),
+        # Field-side lookups only care about live assignments too; ended rows
+        # accumulate over time and stay out of the index.
+        Index(
+            "ix_sensor_assignments_active_field", field_id,
+            postgresql_where=(active == True), sqlite_where=(active == True),
+        ),
+    )
+
     sensor = relationship("Sensor", back_populates="assignments")
     field = relationship("Field")
 
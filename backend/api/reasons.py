@@ -0,0 +1,70 @@
+"""
+Recommendation reason codes.
+
+Recommendations persist their reasons in why_json as compact [code, *args]
+entries instead of the full sentences; they are rendered back to text when a
+response is built. Codes are stored in the database, so never renumber or
+reuse one; only append.
+"""
+
+from enum import IntEnum
+from typing import Iterable, List, Sequence, Union
+
+class Reason(IntEnum):
+    TEXT = 0 # Free-form message passed as the only argument
+    MISSING_SENSOR = 1
+    MISSING_WEATHER = 2
+    IMAGE_ISSUE = 3
+    IMAGE_HEALTHY = 4
+    NO_MOISTURE = 5
+    NO_FORECAST = 6
+    RAIN_PREDICTED = 7
+    STORM_APPROACHING = 8
+    CLEAR_WEATHER = 9
+    MOISTURE_OK = 10
+    SOURCE = 11
+    ML_CONFIRMED = 12
+    ML_DISAGREES = 13
+    SOIL_HEALTHY = 14
+    ML_RESULT = 15
+    ML_POTENTIAL_ISSUE = 16
+    NO_SOIL_TEST = 17
+    TREATMENT = 18
+
+REASON_TEMPLATES = {
+    Reason.TEXT: "{}",
+    Reason.MISSING_SENSOR: "⚠️ Missing sensor readings (critical data).",
+    Reason.MISSING_WEATHER: "⚠️ Missing weather data (past 24h).",
+    Reason.IMAGE_ISSUE: "📸 Visual AI detected: {}",
+    Reason.IMAGE_HEALTHY: "📸 Visual AI check: Plant looks healthy",
+    Reason.NO_MOISTURE: "Cannot determine irrigation need without soil moisture.",
+    Reason.NO_FORECAST: "No weather forecast available; assuming 0 rain.",
+    Reason.RAIN_PREDICTED: "Rain predicted by {} - save water",
+    Reason.STORM_APPROACHING: "Storm approaching in 48h - wait",
+    Reason.CLEAR_WEATHER: "Weather is clear - safe to irrigate",
+    Reason.MOISTURE_OK: "Moisture {}% is sufficient (>= {}%).",
+    Reason.SOURCE: "As per: {}",
+    Reason.ML_CONFIRMED: "Digital check: Confirmed ({})",
+    Reason.ML_DISAGREES: "Digital check: Suggests '{}' - consider retesting",
+    Reason.SOIL_HEALTHY: "Soil is healthy for {} ({} stage)",
+    Reason.ML_RESULT: "Digital check: {}",
+    Reason.ML_POTENTIAL_ISSUE: "Note: Digital check found potential issue - consider retesting",
+    Reason.NO_SOIL_TEST: "Cannot determine fertilizer needs without soil test.",
+    Reason.TREATMENT: "👉 Recommendation: {}",
+}
+
+ReasonEntry = Union[str, Sequence]
+
+def render_reason(entry: ReasonEntry) -> str:
+    # Rows written before reasons were encoded hold the plain sentence
+    if isinstance(entry, str):
+        return entry
+    code, *args = entry
+    return REASON_TEMPLATES[code].format(*args)
+
+def render_reasons(entries: Iterable[ReasonEntry]) -> List[str]:
+    return [render_reason(entry) for entry in entries]
+
+def encode_reasons(entries: Iterable[Sequence]) -> List[list]:
+    """JSON-ready [code, *args] lists for why_json."""
+    return [[int(code), *args] for code, *args in entries]
@@ -1,24 +1,37 @@
 from datetime import datetime, timedelta
+from bisect import bisect_right
+from itertools import accumulate
+from operator import attrgetter
+from types import MappingProxyType
+from typing import List, Optional
 from . import schemas
+from .reasons import Reason, render_reasons
+# Imported at module load (main imports this module at startup) so the soil
+# classifier is unpickled before the first request, not inside it.
+from .crop_nutrient_standards import check_nutrient_adequacy
+from .ml.image_model import analyze_crop_image
+from .ml.model import classifier
 
 # --- Config / Thresholds ---
-MOISTURE_THRESHOLDS = {
+# Read-only views: these are shared by every request thread and must not be
+# mutated at runtime.
+MOISTURE_THRESHOLDS = MappingProxyType({
     "rice": 50.0,
     "wheat": 30.0,
     "maize": 25.0
-}
+})
 
-IRRIGATION_LITERS = {
+IRRIGATION_LITERS = MappingProxyType({
     "rice": 1000.0,
     "wheat": 500.0,
     "maize": 400.0
-}
+})
 
-NUTRIENT_THRESHOLDS_LOW = {
+NUTRIENT_THRESHOLDS_LOW = MappingProxyType({
     "n": 20.0,
     "p": 10.0,
     "k": 10.0
-}
+})
 
 FERTILIZER_TARGETS = {
     "wheat": {
@@ -34,8 +47,22 @@ FERTILIZER_TARGETS = {
         "default": {"n": 40.0, "p": 30.0, "k": 20.0}
     }
 }
+FERTILIZER_TARGETS = MappingProxyType({
+    crop: MappingProxyType({stage: MappingProxyType(t) for stage, t in stages.items()})
+    for crop, stages in FERTILIZER_TARGETS.items()
+})
 
-from typing import List, Optional
+# FERTILIZER_TARGETS flattened to (crop, stage) -> targets; anything not
+# listed gets the default/default entry, same as the nested .get() chain.
+_FERT_TABLE = MappingProxyType({
+    (crop, stage): targets
+    for crop, stages in FERTILIZER_TARGETS.items()
+    for stage, targets in stages.items()
+})
+_DEFAULT_FERT_TARGETS = FERTILIZER_TARGETS["default"]["default"]
+
+_DAY = timedelta(hours=24)
+_point_ts = attrgetter("ts")
 
 def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_forecast: Optional[List[float]] = None, ai_history: Optional[List[float]] = None) -> schemas.RecommendationResponse:
     why_list = []
@@ -47,12 +74,12 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
         data_completeness += 0.1
     else:
         data_completeness -= 0.2
-        why_list.append("⚠️ Missing sensor readings (critical data).")
+        why_list.append((Reason.MISSING_SENSOR,))
         
     if snapshot.weather:
         data_completeness += 0.1
     else:
-        why_list.append("⚠️ Missing weather data (past 24h).")
+        why_list.append((Reason.MISSING_WEATHER,))
         
     if snapshot.images:
         data_completeness += 0.1
@@ -71,8 +98,6 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
     image_treatment = None
     
     if snapshot.images:
-        from .ml.image_model import analyze_crop_image
-        
         # Analyze the most recent image
         latest_img = snapshot.images[0]
         
@@ -87,13 +112,13 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
             image_issue = img_result["detected_issue"]
             image_treatment = img_result.get("treatment")
             
-            why_list.append(f"📸 Visual AI detected: {image_issue}")
+            why_list.append((Reason.IMAGE_ISSUE, image_issue))
             
             # If severity is 'high', it might flag a Risk Alert
             if img_result["severity"] == "high" or img_result["severity"] == "critical":
                 risk_alert = f"Visual Alert: {image_issue} detected. Action required."
         else:
-            why_list.append("📸 Visual AI check: Plant looks healthy")
+            why_list.append((Reason.IMAGE_HEALTHY,))
 
     # 2. Irrigation Logic
     irrigation_action = "UNKNOWN"
@@ -101,7 +126,7 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
     irr_timing = "unknown"
 
     if not snapshot.sensor_readings:
-        why_list.append("Cannot determine irrigation need without soil moisture.")
+        why_list.append((Reason.NO_MOISTURE,))
     else:
         moisture = snapshot.sensor_readings.moisture
         thresh = MOISTURE_THRESHOLDS.get(crop, 30.0)
@@ -109,24 +134,15 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
         # Check rainfall forecast next 24h
         rainfall_next_24h = 0.0
         if snapshot.weather and snapshot.weather.forecast_72h:
-            now = datetime.utcnow() # Note: snapshot.snapshot_ts might be better but let's compare logic
-            # Logic: sum forecast where ts <= now + 24h
-            # We assume forecast list is sorted or we iterate all
-            # Since forecast_72h contains future points:
-            # We need to filter those within next 24h of the snapshot time?
-            # The prompt says "compute rainfall_next_24h from forecast_72h points whose ts <= now+24h"
-            # We will use snapshot.snapshot_ts as "now" for consistency if available, or just iterate.
-            
-            # Simplified: just sum first 4 points if they are 6-hourly?
-            # Or iterate checking timestamps.
-            limit_ts = snapshot.snapshot_ts.replace(tzinfo=None) + timedelta(hours=24)
-            for pt in snapshot.weather.forecast_72h:
-                # remove tz for comparison if needed
-                pt_ts = pt.ts.replace(tzinfo=None)
-                if pt_ts <= limit_ts:
-                    rainfall_next_24h += pt.rainfall_mm
+            # Sum forecast points whose ts <= snapshot time + 24h. Snapshot
+            # timestamps are naive UTC from the DB, and forecast_72h is sorted
+            # ascending, so binary-search the horizon and sum the prefix.
+            forecast = snapshot.weather.forecast_72h
+            limit_ts = snapshot.snapshot_ts.replace(tzinfo=None) + _DAY
+            horizon = bisect_right(forecast, limit_ts, key=_point_ts)
+            rainfall_next_24h = sum(pt.rainfall_mm for pt in forecast[:horizon])
         else:
-            why_list.append("No weather forecast available; assuming 0 rain.")
+            why_list.append((Reason.NO_FORECAST,))
 
         if moisture < thresh:
             # --- HYBRID DECISION LOGIC ---
@@ -134,8 +150,8 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
             ai_rain_24h = 0.0
             ai_rain_48h = 0.0
             if lstm_forecast and len(lstm_forecast) >= 2:
-                ai_rain_24h = float(lstm_forecast[0])
-                ai_rain_48h = sum(lstm_forecast[:2])
+                # Running totals give the 24h/48h horizons in one pass
+                ai_rain_24h, ai_rain_48h = accumulate(map(float, lstm_forecast[:2]))
 
             # 2. Conflict Detection (Risk Alert)
             risk_alert = None
@@ -157,12 +173,12 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
                 irrigation_action = "DELAY"
                 irr_timing = "after rain"
                 source = "API" if rainfall_next_24h > 2.0 else "AI Model"
-                why_list.append(f"Rain predicted by {source} - save water")
+                why_list.append((Reason.RAIN_PREDICTED, source))
             
             elif storm_approaching:
                 irrigation_action = "DELAY"
                 irr_timing = "until after storm"
-                why_list.append("Storm approaching in 48h - wait")
+                why_list.append((Reason.STORM_APPROACHING,))
             
             else:
                 # Both agree it's dry
@@ -170,13 +186,13 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
                 irr_liters = IRRIGATION_LITERS.get(crop, 400.0)
                 irr_timing = "now"
                 irr_timing = "now"
-                why_list.append("Weather is clear - safe to irrigate")
+                why_list.append((Reason.CLEAR_WEATHER,))
 
             if risk_alert:
-                why_list.append(risk_alert)
+                why_list.append((Reason.TEXT, risk_alert))
         else:
             irrigation_action = "NO_ACTION"
-            why_list.append(f"Moisture {moisture}% is sufficient (>= {thresh}%).")
+            why_list.append((Reason.MOISTURE_OK, moisture, thresh))
 
     # 3. Scientific Fertilizer Logic (Primary: ICAR/TNAU Standards)
     fert_action = "NO_ACTION"
@@ -187,9 +203,6 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
     ai_analysis = "ML Model Unavailable"
 
     if snapshot.sensor_readings:
-        from .crop_nutrient_standards import check_nutrient_adequacy
-        from .ml.model import classifier
-        
         sr = snapshot.sensor_readings
         
         # Step 1: Check against scientific thresholds (PRIMARY)
@@ -225,13 +238,13 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
                 # Only add nutrient deficiencies to fertilizer recommendations
                 # Moisture is handled by irrigation
                 if "Nitrogen" in deficiency_msg or "Phosphorus" in deficiency_msg or "Potassium" in deficiency_msg or "pH" in deficiency_msg:
-                    why_list.append(deficiency_msg)
+                    why_list.append((Reason.TEXT, deficiency_msg))
             
             # Add source citation (moved to end for details)
             # Add source citation
             req = adequacy["requirements"]
             sources_str = "; ".join(req["sources"][:1])
-            why_list.append(f"As per: {sources_str}")
+            why_list.append((Reason.SOURCE, sources_str))
             
             # ML confidence check
             ml_agrees = False
@@ -243,44 +256,46 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
                 ml_agrees = True
             
             if ml_agrees:
-                why_list.append(f"Digital check: Confirmed ({ai_analysis})")
+                why_list.append((Reason.ML_CONFIRMED, ai_analysis))
             else:
-                why_list.append(f"Digital check: Suggests '{ai_analysis}' - consider retesting")
+                why_list.append((Reason.ML_DISAGREES, ai_analysis))
             
             # Calculate fertilizer recommendations
-            targets = FERTILIZER_TARGETS.get(crop, FERTILIZER_TARGETS["default"]).get(stage, FERTILIZER_TARGETS["default"]["default"])
+            targets = _FERT_TABLE.get((crop, stage), _DEFAULT_FERT_TARGETS)
             n_rec = targets["n"]
             p_rec = targets["p"]
             k_rec = targets["k"]
         else:
-            why_list.append(f"Soil is healthy for {crop.capitalize()} ({stage} stage)")
-            why_list.append(f"Digital check: {ai_analysis}")
+            why_list.append((Reason.SOIL_HEALTHY, crop.capitalize(), stage))
+            why_list.append((Reason.ML_RESULT, ai_analysis))
             
             # Edge case: ML disagrees with scientific standards
             if "Low" in ai_analysis and not has_deficiency:
-                why_list.append("Note: Digital check found potential issue - consider retesting")
+                why_list.append((Reason.ML_POTENTIAL_ISSUE,))
                 
     else:
-        why_list.append("Cannot determine fertilizer needs without soil test.")
+        why_list.append((Reason.NO_SOIL_TEST,))
 
     # Append Image Treatment if exists (Overrides or adds to fertilizer/action advice)
     if image_treatment:
-        why_list.append(f"👉 Recommendation: {image_treatment}")
+        why_list.append((Reason.TREATMENT, image_treatment))
         # If it's a nutrient deficiency, we could theoretically update fert_action, 
         # but for safety we kept them separate unless scientific data backs it up.
         # This hybrid approach trusts Science (Sensors) > Vision (Images) for nutrients,
         # but trusts Vision for Diseases.
 
     # Construct response
-    return schemas.RecommendationResponse(
+    # Every field below is already typed (the snapshot is a validated model and
+    # the numbers are floats), so skip a second round of validation.
+    response = schemas.RecommendationResponse.model_construct(
         field_id=snapshot.field_id,
         ts=datetime.utcnow(),
-        irrigation=schemas.IrrigationAction(
+        irrigation=schemas.IrrigationAction.model_construct(
             action=irrigation_action,
             liters_per_acre=irr_liters,
             timing=irr_timing
         ),
-        fertilizer=schemas.FertilizerAction(
+        fertilizer=schemas.FertilizerAction.model_construct(
             action=fert_action,
             n_kg_acre=n_rec,
             p_kg_acre=p_rec,
@@ -288,10 +303,13 @@ def generate_recommendation_logic(snapshot: schemas.FieldSnapshotV1, lstm_foreca
             timing=fert_timing
         ),
         data_completeness=data_completeness,
-        why=why_list,
+        why=render_reasons(why_list),
         ai_analysis=image_issue if image_issue else ai_analysis, # Prioritize image issue in summary if found 
         ai_forecast=lstm_forecast, # Pass the raw forecast data [day1, day2, day3]
         ai_history=ai_history, # Pass historical rainfall (last 7 days)
         risk_alert=risk_alert, # Pass hybrid logic alert
         snapshot_used=snapshot
     )
+    # Compact (code, *args) form, which is what gets persisted
+    response._why_codes = why_list
+    return response
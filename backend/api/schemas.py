@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Literal
+from .reasons import render_reasons
 
 # --- Base Schemas ---
 
@@ -37,8 +38,7 @@ class Token(BaseModel):
 class FarmerResponse(FarmerBase):
     id: str
     created_at: datetime
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FieldBase(BaseModel):
     farmer_id: str
@@ -54,8 +54,7 @@ class FieldCreate(FieldBase):
 class FieldResponse(FieldBase):
     id: str
     created_at: datetime
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FieldUpdate(BaseModel):
     name: Optional[str] = None
@@ -74,6 +73,12 @@ class SensorReadingCreate(BaseModel):
     p: float
     k: float
 
+def _naive_utc(ts: datetime) -> datetime:
+    # Timestamps are stored and compared as naive UTC
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
 class WeatherReadingCreate(BaseModel):
     field_id: str
     ts: datetime
@@ -81,6 +86,8 @@ class WeatherReadingCreate(BaseModel):
     humidity_pct: float
     rainfall_mm: float
 
+    _ts_naive_utc = field_validator("ts")(_naive_utc)
+
 class ImageCreate(BaseModel):
     field_id: str
     ts: datetime
@@ -90,20 +97,22 @@ class ImageCreate(BaseModel):
 
 class ImageResponse(ImageCreate):
     id: str
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Snapshot Schemas ---
 
+# Snapshot and action parts are built once and only read afterwards
 class Location(BaseModel):
     lat: float
     lon: float
+    model_config = ConfigDict(frozen=True)
 
 class WeatherPoint(BaseModel):
     ts: datetime
     temp_c: float
     humidity_pct: float
     rainfall_mm: float
+    model_config = ConfigDict(frozen=True)
 
 class WeatherSummary(BaseModel):
     ts: datetime
@@ -118,8 +127,7 @@ class ImageSummary(BaseModel):
     source: str
     rgb_url: str
     notes: Optional[str] = None
-    class Config:
-        json_encoders = {datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
 
 class SensorSummary(BaseModel):
     ts: datetime
@@ -128,14 +136,11 @@ class SensorSummary(BaseModel):
     n: float
     p: float
     k: float
-    class Config:
-        json_encoders = {datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(frozen=True, json_encoders={datetime: lambda v: v.isoformat()})
         
 class WeatherReadingResponse(WeatherReadingCreate):
     id: str
-    class Config:
-        from_attributes = True
-        json_encoders = {datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(from_attributes=True, json_encoders={datetime: lambda v: v.isoformat()})
 
 class FieldSnapshotV1(BaseModel):
     field_id: str
@@ -155,6 +160,7 @@ class IrrigationAction(BaseModel):
     action: str
     liters_per_acre: float
     timing: str
+    model_config = ConfigDict(frozen=True)
 
 class FertilizerAction(BaseModel):
     action: str
@@ -162,6 +168,7 @@ class FertilizerAction(BaseModel):
     p_kg_acre: float
     k_kg_acre: float
     timing: str
+    model_config = ConfigDict(frozen=True)
 
 class RecommendationResponse(BaseModel):
     id: Optional[str] = None # Added for feedback reference, optional for backward compat if generated purely logic-side? No, usually DB based.
@@ -176,9 +183,10 @@ class RecommendationResponse(BaseModel):
     ai_history: Optional[List[float]] = None # Added for historical rainfall (last 7 days)
     risk_alert: Optional[str] = None # Added for Hybrid Logic (API vs AI conflict)
     snapshot_used: FieldSnapshotV1
+    # Reasons as (Reason, *args) entries; this is what why_json stores
+    _why_codes: list = PrivateAttr(default_factory=list)
     
-    class Config:
-        from_attributes = True # Allow ORM mapping
+    model_config = ConfigDict(from_attributes=True) # Allow ORM mapping
 
 class FeedbackCreate(BaseModel):
     field_id: str
@@ -190,8 +198,7 @@ class FeedbackCreate(BaseModel):
 class FeedbackResponse(FeedbackCreate):
     id: str
     ts: datetime
-    class Config:
-        from_attributes = True 
+    model_config = ConfigDict(from_attributes=True)
 
 class RecommendationHistoryItem(BaseModel):
     id: str
@@ -201,11 +208,10 @@ class RecommendationHistoryItem(BaseModel):
     data_completeness: float
     why_json: List[str]
     # Snapshot omitted/optional
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        from_attributes = True
+    # Stored as [code, *args] entries (see reasons.py); render them to text
+    _render_why = field_validator("why_json", mode="before")(render_reasons)
 
 # --- Sensor Schemas ---
 
@@ -224,8 +230,7 @@ class SensorResponse(SensorBase):
     created_at: datetime
     current_assignment: Optional["SensorAssignmentResponse"] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SensorAssignmentBase(BaseModel):
     sensor_id: str
@@ -245,8 +250,7 @@ class SensorAssignmentResponse(SensorAssignmentBase):
     ended_at: Optional[datetime] = None
     field_name: Optional[str] = None # Enriched
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Update circular references
 SensorResponse.model_rebuild()
@@ -0,0 +1,135 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("api")
+
+# Weather model training is CPU-bound and takes seconds to minutes, so it runs
+# in a separate worker process rather than as a FastAPI BackgroundTask on the
+# API worker. "spawn" keeps the child from inheriting the parent's DB pool and
+# torch thread state.
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "1"))
+# Repeat requests to train the same field at the same location within this
+# window coalesce into the run already queued or finished.
+TRAINING_DEDUPE_TTL = 600.0
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+class _FieldTraining:
+    """Training state for one field; runs for a field never overlap."""
+    __slots__ = ("location", "started", "future", "pending")
+
+    def __init__(self):
+        self.location: Optional[Tuple[float, float]] = None # of the latest run
+        self.started = 0.0
+        self.future: Optional[Future] = None
+        # Location requested while a run was in flight; trained right after it
+        self.pending: Optional[Tuple[float, float]] = None
+
+
+_fields: Dict[str, _FieldTraining] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=TRAINING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _train_model(field_id: str, lat: float, lon: float):
+    # Imported in the worker so the parent never pays for it on enqueue
+    from .weather_ml import weather_ml_service
+    weather_ml_service.train_model_for_field(field_id, lat, lon)
+
+
+def _log_failure(field_id: str, future: Future):
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Training job for field %s failed: %s", field_id, exc)
+
+
+def _start(field_id: str, state: _FieldTraining, location: Tuple[float, float], now: float) -> Future:
+    # Caller holds _lock, and must call _watch() once it has released it (a
+    # done callback can run right away, and it takes the lock)
+    state.location = location
+    state.started = now
+    state.pending = None
+    state.future = _get_executor().submit(_train_model, field_id, *location)
+    return state.future
+
+
+def _watch(field_id: str, future: Future):
+    future.add_done_callback(lambda f: _on_done(field_id, f))
+
+
+def _on_done(field_id: str, future: Future):
+    _log_failure(field_id, future)
+    with _lock:
+        state = _fields.get(field_id)
+        # Gone after shutdown()
+        if state is None or state.future is not future:
+            return
+        state.future = None
+        if state.pending is None or future.cancelled():
+            return
+        # The field moved while this run was training; train the newest
+        # location now that the model files are free again
+        future = _start(field_id, state, state.pending, time.monotonic())
+    _watch(field_id, future)
+
+
+def enqueue_training(field_id: str, lat: float, lon: float) -> bool:
+    """
+    Queue weather model training for a field; returns False if coalesced.
+    
+    Only the latest requested location matters. A request for another
+    location while a run is in flight is trained as soon as that run ends
+    (replacing any earlier pending one), so two runs never write the same
+    field's model files at once.
+    """
+    location = (round(lat, 4), round(lon, 4))
+    now = time.monotonic()
+    with _lock:
+        state = _fields.get(field_id)
+        if state is None:
+            state = _fields[field_id] = _FieldTraining()
+        elif state.future is not None:
+            if location == state.location:
+                # The run in flight already trains this location
+                state.pending = None
+                return False
+            if location == state.pending:
+                return False
+            state.pending = location
+            return True
+        elif location == state.location and now - state.started < TRAINING_DEDUPE_TTL:
+            return False
+        # Drop idle fields past the window so the map doesn't grow unbounded
+        for k in [k for k, st in _fields.items()
+                  if st.future is None and now - st.started >= TRAINING_DEDUPE_TTL and k != field_id]:
+            del _fields[k]
+        future = _start(field_id, state, location, now)
+    _watch(field_id, future)
+    return True
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _fields.clear()
+    # Outside the lock: cancelling runs their done callbacks in this thread
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,35 +1,71 @@
-import requests
+import httpx
 import datetime
 import logging
-from typing import List, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 from .. import schemas
 
 logger = logging.getLogger("api")
 
 OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
 
-def fetch_live_weather(lat: float, lon: float, field_id: str) -> Tuple[Optional[schemas.WeatherReadingCreate], List[schemas.WeatherReadingCreate]]:
+# Shared client so keep-alive connections (and their TLS sessions) to
+# Open-Meteo are reused across fetches instead of reconnecting every time.
+_client = httpx.AsyncClient(
+    timeout=5.0,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+)
+
+# Open-Meteo data is hourly and fields within ~1 km share a grid cell, so
+# responses are reused per rounded location for a while.
+WEATHER_CACHE_TTL = 900.0
+WEATHER_CACHE_MAX = 1024
+_cache: Dict[Tuple[float, float], Tuple[float, datetime.datetime, dict]] = {}
+
+async def close_client():
+    await _client.aclose()
+
+async def _get_forecast(lat: float, lon: float) -> Tuple[datetime.datetime, dict]:
+    """Open-Meteo payload for a location, plus the UTC time it was fetched."""
+    key = (round(lat, 2), round(lon, 2))
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit and now - hit[0] < WEATHER_CACHE_TTL:
+        return hit[1], hit[2]
+
+    params = {
+        "latitude": key[0],
+        "longitude": key[1],
+        "current": "temperature_2m,relative_humidity_2m,rain",
+        "hourly": "temperature_2m,relative_humidity_2m,rain",
+        "forecast_days": 3 # 72 hours approx
+    }
+    response = await _client.get(OPEN_METEO_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+    fetched_at = datetime.datetime.utcnow()
+
+    # Drop expired entries once full, then the oldest if still full
+    _cache.pop(key, None)
+    if len(_cache) >= WEATHER_CACHE_MAX:
+        for k in [k for k, (ts, _, _) in _cache.items() if now - ts >= WEATHER_CACHE_TTL]:
+            del _cache[k]
+        if len(_cache) >= WEATHER_CACHE_MAX:
+            del _cache[next(iter(_cache))]
+    _cache[key] = (now, fetched_at, data)
+    return fetched_at, data
+
+async def fetch_live_weather(lat: float, lon: float, field_id: str) -> Tuple[Optional[schemas.WeatherReadingCreate], List[schemas.WeatherReadingCreate]]:
     """
     Fetches current weather and 7-day forecast from Open-Meteo.
     Returns: (CurrentReading, List[ForecastReadings])
     """
     try:
-        # Fetch current weather + forecast
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,relative_humidity_2m,rain",
-            "hourly": "temperature_2m,relative_humidity_2m,rain",
-            "forecast_days": 3 # 72 hours approx
-        }
-        
-        response = requests.get(OPEN_METEO_URL, params=params, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+        # Fetch current weather + forecast (cached per rounded location)
+        ts_now, data = await _get_forecast(lat, lon)
         
         # 1. Parse Current Weather
         current = data.get("current", {})
-        ts_now = datetime.datetime.utcnow()
         
         current_reading = schemas.WeatherReadingCreate(
             field_id=field_id,
@@ -48,21 +84,16 @@ def fetch_live_weather(lat: float, lon: float, field_id: str) -> Tuple[Optional[
         rains = hourly.get("rain", [])
         
         # Open-Meteo returns ISO strings. We take every 6th hour to match our simulator style/reduce data
-        for i, t_str in enumerate(times):
-            if i % 6 != 0: continue # optimized step
-            
-            # Simple ISO parsing (Open-Meteo usually "2023-10-10T12:00")
-            try:
-                ts = datetime.datetime.fromisoformat(t_str)
-            except ValueError:
-                continue
-                
+        step = 6
+        for t_str, temp, humidity, rain in zip(times[::step], temps[::step], humidities[::step], rains[::step]):
+            # Open-Meteo always sends "2023-10-10T12:00"; anything else means the
+            # API changed, so let it raise and fail the whole fetch (logged below)
             forecast_readings.append(schemas.WeatherReadingCreate(
                 field_id=field_id,
-                ts=ts,
-                temp_c=temps[i],
-                humidity_pct=humidities[i],
-                rainfall_mm=rains[i]
+                ts=datetime.datetime.fromisoformat(t_str),
+                temp_c=temp,
+                humidity_pct=humidity,
+                rainfall_mm=rain
             ))
             
         return current_reading, forecast_readings
@@ -1,32 +1,228 @@
-import requests
-import pandas as pd
+import asyncio
+import httpx
+import orjson
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import torch
 import torch.nn as nn
 import torch.optim as optim
+from torch.utils.data import DataLoader, TensorDataset
 import os
+import sys
 import logging
+import threading
+from collections import OrderedDict
+from operator import itemgetter
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sklearn.preprocessing import MinMaxScaler
 from api.ml.lstm import LSTMWeatherModel
 import joblib
 
+try:
+    import onnxruntime as ort
+except ImportError:  # Optional: pip install .[onnx]
+    ort = None
+
 logger = logging.getLogger("api")
 
 OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "../ml/models")
 os.makedirs(MODELS_DIR, exist_ok=True)
+TRAIN_BATCH_SIZE = 64
+# Stop once the epoch loss hasn't improved by EARLY_STOP_MIN_DELTA for this
+# many epochs; the learning rate is halved after half as many
+EARLY_STOP_PATIENCE = 10
+EARLY_STOP_MIN_DELTA = 1e-4
+# Model input features, in column order
+FEATURE_COLUMNS = ("temp_max", "temp_min", "rain", "humidity")
+# Open-Meteo archive daily variables matching FEATURE_COLUMNS
+ARCHIVE_DAILY_KEYS = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum", "relative_humidity_2m_mean")
+_feature_row = itemgetter(*FEATURE_COLUMNS)
+# The archive API occasionally times out or returns 5xx for multi-year ranges
+HISTORY_FETCH_TIMEOUT = 30.0
+HISTORY_FETCH_ATTEMPTS = 3
+
+async def _get_archive(client: httpx.AsyncClient, params: dict) -> dict:
+    """GET the Open-Meteo archive, retrying transient failures with backoff."""
+    for attempt in range(HISTORY_FETCH_ATTEMPTS):
+        try:
+            res = await client.get(OPEN_METEO_ARCHIVE_URL, params=params)
+            res.raise_for_status()
+            return orjson.loads(res.content)
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in (429, 500, 502, 503, 504)
+            if not retryable or attempt == HISTORY_FETCH_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+# Loaded (run, scale, offset) entries kept per field
+ARTIFACT_CACHE_SIZE = 256
+ONNX_OPSET = 17
+# Serve the FP32 weights on the GPU when there is one (int8 kernels are CPU-only)
+CUDA_INFERENCE = torch.cuda.is_available()
+# Batch sizes captured as CUDA graphs per model; other sizes run eagerly
+CUDA_GRAPH_LIMIT = 8
+# Inductor needs Triton, which isn't available on Windows
+TORCH_COMPILE = sys.platform != "win32"
+
+def _quantize(model: nn.Module) -> nn.Module:
+    # Dynamic int8 quantization of the LSTM + FC layers for CPU inference
+    return torch.quantization.quantize_dynamic(model.eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+def _load_state(model_path: str) -> dict:
+    # Memory-mapped and weights-only: tensors are paged in from the file (and
+    # the OS page cache) instead of read and unpickled up front
+    return torch.load(model_path, map_location="cpu", weights_only=True, mmap=True)
+
+def _load_torch_model(model_path: str, input_size: int):
+    # Instantiate with SAME architecture
+    model = LSTMWeatherModel(input_size=input_size, hidden_size=64, num_layers=3)
+    if model_path.endswith("_int8.pth"):
+        # Already-quantized weights: build the quantized modules, then fill them
+        model = _quantize(model)
+        # Quantized LSTM weights are packed into ScriptObjects, which the
+        # weights-only unpickler rejects unless allowed explicitly
+        with torch.serialization.safe_globals([torch.ScriptObject]):
+            model.load_state_dict(_load_state(model_path))
+    else:
+        # FP32 checkpoint from before int8 ones were saved
+        model.load_state_dict(_load_state(model_path), assign=True)
+        model = _quantize(model)
+    
+    def run(x: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            return model(torch.from_numpy(x)).numpy()
+    return run
+
+def _load_cuda_model(model_path: str, input_size: int, seq_length: int):
+    model = LSTMWeatherModel(input_size=input_size, hidden_size=64, num_layers=3)
+    # assign=True adopts the mapped tensors; .cuda() then copies them over once
+    model.load_state_dict(_load_state(model_path), assign=True)
+    model = model.cuda().eval()
+    if TORCH_COMPILE:
+        try:
+            return _compiled_runner(model, (1, seq_length, input_size))
+        except Exception as e:
+            logger.warning("torch.compile failed, using captured CUDA graphs: %s", e)
+    return _cuda_graph_runner(model)
+
+def _compiled_runner(model: nn.Module, shape: tuple):
+    # Inductor fuses the pointwise work around the cuDNN LSTM, and
+    # reduce-overhead records each input shape's kernels as a CUDA graph
+    # (one recompile per new batch size, like CUDA_GRAPH_LIMIT below)
+    compiled = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+    lock = threading.Lock() # graph outputs are reused between replays
+    
+    def run(x: np.ndarray) -> np.ndarray:
+        with lock, torch.inference_mode():
+            return compiled(torch.from_numpy(x).cuda()).cpu().numpy()
+    
+    # The first calls compile and record; do them now rather than in a request
+    for _ in range(3):
+        run(np.zeros(shape, dtype=np.float32))
+    return run
+
+def _cuda_graph_runner(model: nn.Module):
+    # A forward is dozens of tiny kernels, so at these batch sizes launch
+    # overhead dominates. Capture it once per batch size and replay the graph
+    # against static input/output buffers.
+    graphs = {} # batch size -> (graph, static_in, static_out)
+    lock = threading.Lock() # the static buffers are shared between requests
+    
+    def capture(shape):
+        static_in = torch.zeros(shape, device="cuda")
+        # Warm up on a side stream so cuDNN is initialised before capture
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream), torch.inference_mode():
+            for _ in range(3):
+                model(static_in)
+        torch.cuda.current_stream().wait_stream(stream)
+        graph = torch.cuda.CUDAGraph()
+        with torch.inference_mode(), torch.cuda.graph(graph):
+            static_out = model(static_in)
+        return graph, static_in, static_out
+    
+    def run(x: np.ndarray) -> np.ndarray:
+        with lock:
+            entry = graphs.get(len(x))
+            if entry is None and len(graphs) < CUDA_GRAPH_LIMIT:
+                entry = graphs[len(x)] = capture(x.shape)
+            if entry is None:
+                with torch.inference_mode():
+                    return model(torch.from_numpy(x).cuda()).cpu().numpy()
+            graph, static_in, static_out = entry
+            static_in.copy_(torch.from_numpy(x))
+            graph.replay()
+            return static_out.cpu().numpy()
+    return run
+
+def _load_onnx_model(model_path: str):
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Requests carry one or a few histories; threading them costs more than it saves
+    so.intra_op_num_threads = 1
+    sess = ort.InferenceSession(model_path, sess_options=so, providers=["CPUExecutionProvider"])
+    
+    def run(x: np.ndarray) -> np.ndarray:
+        return sess.run(None, {"x": x})[0]
+    return run
+
+def _load_artifacts(model_path: str, scaler_path: str, input_size: int, seq_length: int):
+    """Load and warm up a field's model (ONNX, CUDA or CPU PyTorch), plus its scaler."""
+    if model_path.endswith(".onnx"):
+        run = _load_onnx_model(model_path)
+    elif CUDA_INFERENCE:
+        run = _load_cuda_model(model_path, input_size, seq_length)
+    else:
+        run = _load_torch_model(model_path, input_size)
+    # One dummy pass so the first real request doesn't pay for lazy init
+    run(np.zeros((1, seq_length, input_size), dtype=np.float32))
+    
+    scale, offset = load_scaler(scaler_path)
+    return run, scale, offset
+
+def save_scaler(scaler_path: str, scaler: MinMaxScaler):
+    """Save a fitted MinMaxScaler as just its coefficients (.npz)."""
+    np.savez(scaler_path, scale=scaler.scale_, min=scaler.min_)
+
+def load_scaler(scaler_path: str):
+    """
+    (scale, offset) arrays of a field's MinMaxScaler, in FEATURE_COLUMNS order.
+    
+    The scaler maps x -> x * scale + offset, so inputs are scaled (and the
+    Rain column unscaled) with plain array arithmetic, the same operations
+    MinMaxScaler.transform does. Reads the .npz written by save_scaler, or a
+    pickled scaler from before those existed.
+    """
+    if scaler_path.endswith(".npz"):
+        with np.load(scaler_path) as coefs:
+            return coefs["scale"], coefs["min"]
+    scaler = joblib.load(scaler_path)
+    names = getattr(scaler, "feature_names_in_", None)
+    # Older scalers were fitted on a DataFrame; make sure its columns were
+    # in the order inputs are built in
+    if names is not None and tuple(names) != FEATURE_COLUMNS:
+        raise ValueError(f"Unexpected scaler columns {list(names)}")
+    return scaler.scale_, scaler.min_
 
 class WeatherMLService:
     def __init__(self):
-        self.scaler = MinMaxScaler()
         self.input_size = 4 # Temp Max, Temp Min, Rain, Humidity
         self.seq_length = 7
         self.output_size = 3 # Next 3 days rain
+        # field_id -> ((model_mtime, scaler_mtime), artifacts), least recently used first
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
-    def _fetch_historical_data(self, lat: float, lon: float, years=2) -> pd.DataFrame:
-        """Fetch historical weather data from Open-Meteo."""
+    async def _fetch_historical_data(self, lat: float, lon: float, years=2, client: Optional[httpx.AsyncClient] = None) -> np.ndarray:
+        """
+        Fetch historical weather data from Open-Meteo.
+        
+        Pass a shared `client` to overlap several fetches (asyncio.gather);
+        otherwise a short-lived one is opened for this call.
+        """
         end_date = datetime.now().strftime("%Y-%m-%d")
         start_date = (datetime.now() - timedelta(days=years*365)).strftime("%Y-%m-%d")
         
@@ -35,142 +231,256 @@ class WeatherMLService:
             "longitude": lon,
             "start_date": start_date,
             "end_date": end_date,
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,relative_humidity_2m_mean",
+            "daily": ",".join(ARCHIVE_DAILY_KEYS),
             "timezone": "auto"
         }
         
         try:
-            res = requests.get(OPEN_METEO_ARCHIVE_URL, params=params)
-            res.raise_for_status()
-            data = res.json()
+            if client is None:
+                async with httpx.AsyncClient(timeout=HISTORY_FETCH_TIMEOUT) as client:
+                    data = await _get_archive(client, params)
+            else:
+                data = await _get_archive(client, params)
             
-            df = pd.DataFrame(data['daily'])
-            # Rename columns to standard internal names
-            df = df.rename(columns={
-                "temperature_2m_max": "temp_max",
-                "temperature_2m_min": "temp_min",
-                "precipitation_sum": "rain",
-                "relative_humidity_2m_mean": "humidity"
-            })
-            return df[["temp_max", "temp_min", "rain", "humidity"]].fillna(0)
+            # (days, 4) in FEATURE_COLUMNS order, missing values as 0
+            daily = data["daily"]
+            return np.nan_to_num(np.column_stack([
+                np.asarray(daily[key], dtype=np.float64) for key in ARCHIVE_DAILY_KEYS
+            ]), nan=0.0)
             
         except Exception as e:
-            logger.error(f"Failed to fetch historical weather: {e}")
+            logger.error("Failed to fetch historical weather: %s", e)
             raise
 
     def _prepare_sequences(self, data: np.ndarray):
         """Create sequences for LSTM."""
-        X, y = [], []
-        # We want to predict Rain (index 2)
-        for i in range(len(data) - self.seq_length - self.output_size):
-            # Input: Sequence of all features
-            X.append(data[i:(i + self.seq_length)])
-            # Output: Sequence of Rain only (next 3 days)
-            y.append(data[(i + self.seq_length):(i + self.seq_length + self.output_size), 2]) 
-            
-        return np.array(X), np.array(y)
+        count = len(data) - self.seq_length - self.output_size
+        if count <= 0:
+            return (np.empty((0, self.seq_length, self.input_size)),
+                    np.empty((0, self.output_size)))
+        # Input: sequence of all features. Each window is a strided view into
+        # `data`, so this is one C-level pass instead of a Python loop.
+        X = sliding_window_view(
+            data[:count + self.seq_length - 1], (self.seq_length, self.input_size)
+        )[:count, 0]
+        # Output: sequence of Rain only (index 2, next 3 days)
+        rain = data[self.seq_length:, 2]
+        y = sliding_window_view(rain, self.output_size)[:count]
+        return np.ascontiguousarray(X), np.ascontiguousarray(y)
 
     def train_model_for_field(self, field_id: str, lat: float, lon: float):
         """Train and save a model specifically for this field."""
-        logger.info(f"Training Weather Model for Field {field_id}...")
+        logger.info("Training Weather Model for Field %s...", field_id)
         
         # 1. Fetch Data
-        df = self._fetch_historical_data(lat, lon)
-        if df.empty:
+        history = asyncio.run(self._fetch_historical_data(lat, lon))
+        if not len(history):
             logger.warning("No weather data found.")
             return
             
         # 2. Preprocess
-        # Fit scaler on this field's data
-        scaled_data = self.scaler.fit_transform(df)
+        # Fit a fresh scaler on this field's data
+        scaler = MinMaxScaler()
+        scaled_data = scaler.fit_transform(history)
         
         # Save Scaler for inference
-        scaler_path = os.path.join(MODELS_DIR, f"scaler_{field_id}.joblib")
-        joblib.dump(self.scaler, scaler_path)
+        scaler_path = os.path.join(MODELS_DIR, f"scaler_{field_id}.npz")
+        save_scaler(scaler_path, scaler)
         
         X, y = self._prepare_sequences(scaled_data)
         
-        X_tensor = torch.FloatTensor(X)
-        y_tensor = torch.FloatTensor(y)
+        X_tensor = torch.from_numpy(X).float()
+        y_tensor = torch.from_numpy(y).float()
+        
+        # Train on the GPU when there is one; bf16 autocast there routes the
+        # LSTM matmuls to tensor cores. On CPU this is plain FP32.
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        use_cuda = device.type == "cuda"
+        if use_cuda:
+            torch.set_float32_matmul_precision("high")
+        loader = DataLoader(
+            TensorDataset(X_tensor, y_tensor),
+            batch_size=TRAIN_BATCH_SIZE,
+            shuffle=True,
+            pin_memory=use_cuda,
+        )
         
         # 3. Model Setup
         # SOTA: Stacked Bi-LSTM (3 layers, 64 units)
-        model = LSTMWeatherModel(input_size=self.input_size, hidden_size=64, num_layers=3, dropout=0.2)
+        model = LSTMWeatherModel(input_size=self.input_size, hidden_size=64, num_layers=3, dropout=0.2).to(device)
         criterion = nn.MSELoss()
         optimizer = optim.Adam(model.parameters(), lr=0.001)
+        scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, factor=0.5, patience=EARLY_STOP_PATIENCE // 2)
         
-        # 4. Train Loop
-        epochs = 100  # Increased for deeper model
+        # 4. Train Loop (mini-batches)
+        epochs = 100  # Upper bound; usually stops early on plateau
+        best_loss = float("inf")
+        best_state = None
+        patience_left = EARLY_STOP_PATIENCE
         for epoch in range(epochs):
             model.train()
-            optimizer.zero_grad()
-            outputs = model(X_tensor)
-            loss = criterion(outputs, y_tensor)
-            loss.backward()
-            optimizer.step()
+            # Summed on the device; read back once per epoch
+            epoch_loss = torch.zeros((), device=device)
+            for xb, yb in loader:
+                xb = xb.to(device, non_blocking=True)
+                yb = yb.to(device, non_blocking=True)
+                optimizer.zero_grad(set_to_none=True)
+                with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=use_cuda):
+                    outputs = model(xb)
+                    loss = criterion(outputs.float(), yb)
+                loss.backward()
+                optimizer.step()
+                epoch_loss += loss.detach() * len(xb)
             
+            cur = epoch_loss.item() / len(X_tensor)
+            scheduler.step(cur)
             if (epoch+1) % 10 == 0:
-                logger.info(f"Field {field_id} | Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.4f}")
+                logger.info("Field %s | Epoch [%d/%d], Loss: %.4f", field_id, epoch+1, epochs, cur)
+            
+            if cur < best_loss - EARLY_STOP_MIN_DELTA:
+                best_loss = cur
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+                patience_left = EARLY_STOP_PATIENCE
+            else:
+                patience_left -= 1
+                if patience_left == 0:
+                    logger.info("Field %s | Loss plateaued, stopping at epoch %d", field_id, epoch+1)
+                    break
                 
-        # 5. Save Model
+        # 5. Save Model (the best epoch's weights, not the last one's)
+        if best_state is not None:
+            model.load_state_dict(best_state)
         model_path = os.path.join(MODELS_DIR, f"model_{field_id}.pth")
+        model = model.to("cpu").eval()
         torch.save(model.state_dict(), model_path)
-        logger.info(f"✅ Trained and Saved Model: {model_path}")
+        logger.info("✅ Trained and Saved Model: %s", model_path)
+        # The int8 copy is what PyTorch inference loads; the FP32 weights are
+        # kept for the ONNX export and for re-quantizing later
+        int8_path = os.path.join(MODELS_DIR, f"model_{field_id}_int8.pth")
+        torch.save(_quantize(model).state_dict(), int8_path)
+        self._export_onnx(field_id, model)
+        self.invalidate(field_id)
+
+    def _export_onnx(self, field_id: str, model: nn.Module):
+        """Export the trained model for ONNX Runtime, which serves it when installed."""
+        onnx_path = os.path.join(MODELS_DIR, f"model_{field_id}.onnx")
+        # Never leave an export from an earlier training run next to the new .pth
+        if os.path.exists(onnx_path):
+            os.remove(onnx_path)
+        if ort is None:
+            return
+        try:
+            torch.onnx.export(
+                model,
+                torch.zeros(1, self.seq_length, self.input_size),
+                onnx_path,
+                opset_version=ONNX_OPSET,
+                input_names=["x"],
+                output_names=["y"],
+                dynamic_axes={"x": {0: "B"}, "y": {0: "B"}},
+            )
+            logger.info("✅ Exported ONNX Model: %s", onnx_path)
+        except Exception as e:
+            # The .pth is still served, just through PyTorch
+            logger.warning("ONNX export failed for field %s: %s", field_id, e)
+            if os.path.exists(onnx_path):
+                os.remove(onnx_path)
+
+    def invalidate(self, field_id: str):
+        """Drop a field's cached model (e.g. after retraining it)."""
+        with self._cache_lock:
+            self._cache.pop(field_id, None)
+
+    def _get_artifacts(self, field_id: str):
+        """Cached (run, scale, offset) for a field, or None if untrained."""
+        model_path = os.path.join(MODELS_DIR, f"model_{field_id}.pth")
+        int8_path = os.path.join(MODELS_DIR, f"model_{field_id}_int8.pth")
+        onnx_path = os.path.join(MODELS_DIR, f"model_{field_id}.onnx")
+        # The GPU serves the FP32 .pth; on CPU prefer ONNX, then int8
+        if not CUDA_INFERENCE:
+            if ort is not None and os.path.exists(onnx_path):
+                model_path = onnx_path
+            elif os.path.exists(int8_path):
+                model_path = int8_path
+        scaler_path = os.path.join(MODELS_DIR, f"scaler_{field_id}.npz")
+        if not os.path.exists(scaler_path):
+            scaler_path = os.path.join(MODELS_DIR, f"scaler_{field_id}.joblib")
+        
+        try:
+            # Training runs in a worker process, so the file versions are what
+            # tell this process that a cached model is stale
+            version = (os.stat(model_path).st_mtime_ns, os.stat(scaler_path).st_mtime_ns)
+        except FileNotFoundError:
+            logger.warning("No model found for field %s", field_id)
+            return None
+        
+        with self._cache_lock:
+            hit = self._cache.get(field_id)
+            if hit and hit[0] == version:
+                self._cache.move_to_end(field_id)
+                return hit[1]
+        
+        artifacts = _load_artifacts(model_path, scaler_path, self.input_size, self.seq_length)
+        with self._cache_lock:
+            self._cache[field_id] = (version, artifacts)
+            self._cache.move_to_end(field_id)
+            while len(self._cache) > ARTIFACT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return artifacts
 
     def predict_next_3_days(self, field_id: str, recent_data: List[Dict]) -> List[float]:
         """
         Predict rain for next 3 days.
         recent_data: List of last 7 days dicts [{'temp_max':.., 'rain':..}, ...]
         """
-        model_path = os.path.join(MODELS_DIR, f"model_{field_id}.pth")
-        scaler_path = os.path.join(MODELS_DIR, f"scaler_{field_id}.joblib")
+        return self.predict_next_3_days_batch([field_id], [recent_data])[0].tolist()
+
+    def predict_next_3_days_batch(self, field_ids: List[str], recent_data_batch: List[List[Dict]]) -> np.ndarray:
+        """
+        Predict rain for next 3 days for several fields.
         
-        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-            logger.warning(f"No model found for field {field_id}")
-            return [0.0, 0.0, 0.0]
-            
-        try:
-            # Load artifacts
-            # Instantiate with SAME architecture
-            model = LSTMWeatherModel(input_size=self.input_size, hidden_size=64, num_layers=3)
-            model.load_state_dict(torch.load(model_path))
-            model.eval()
-            
-            scaler = joblib.load(scaler_path)
-            
-            # Prepare Input
-            df = pd.DataFrame(recent_data)
-            # Ensure columns order
-            df = df[["temp_max", "temp_min", "rain", "humidity"]]
-            
-            # Scale
-            scaled = scaler.transform(df) # Shape (7, 4)
-            input_tensor = torch.FloatTensor(scaled).unsqueeze(0) # (1, 7, 4)
-            
-            # Predict
-            with torch.no_grad():
-                prediction_scaled = model(input_tensor) # (1, 3)
+        Returns a (B, 3) array aligned with `field_ids`; rows for fields with
+        no trained model or no history, or whose prediction fails, are zeros. Every field
+        has its own weights, so histories are stacked into one forward pass
+        per (field, history length) group.
+        """
+        predictions = np.zeros((len(field_ids), self.output_size))
+        groups: Dict[tuple, List[int]] = {}
+        for i, (field_id, recent_data) in enumerate(zip(field_ids, recent_data_batch)):
+            groups.setdefault((field_id, len(recent_data)), []).append(i)
+        
+        for (field_id, seq_len), rows in groups.items():
+            # No history to predict from; leave the zero rows
+            if seq_len == 0:
+                continue
+            try:
+                artifacts = self._get_artifacts(field_id)
+                if artifacts is None:
+                    continue
+                run, scale, offset = artifacts
                 
-            prediction_scaled = prediction_scaled.numpy()[0]
-            
-            # Inverse Transform?
-            # Start tricky part: We predicted 3 future Rain values (one feature).
-            # The scaler works on 4 features.
-            # We need to construct a dummy matrix to inverse transform.
-            
-            dummy = np.zeros((3, 4))
-            dummy[:, 2] = prediction_scaled # Fill Rain column
-            
-            # Inverse transform and extract Rain column
-            prediction_actual = scaler.inverse_transform(dummy)[:, 2]
-            
-            # Clip negative values (though ReLU helps)
-            prediction_actual = [max(0.0, float(x)) for x in prediction_actual]
-            
-            return prediction_actual
-
-        except Exception as e:
-            logger.error(f"Prediction failed: {e}")
-            return [0.0, 0.0, 0.0]
+                # Prepare Input (columns in training order) and scale it in place
+                scaled = np.array(
+                    [[_feature_row(r) for r in recent_data_batch[i]] for i in rows],
+                    dtype=np.float64,
+                ) # (n, seq, 4)
+                scaled *= scale
+                scaled += offset
+                
+                # Predict
+                prediction_scaled = run(scaled.astype(np.float32)) # (n, 3)
+                
+                # Inverse-transform the Rain column only and clip negatives
+                # (though ReLU helps). The first op widens to float64 into a
+                # fresh buffer; the rest reuse it.
+                unscaled = np.subtract(prediction_scaled, offset[2], dtype=np.float64)
+                unscaled /= scale[2]
+                np.maximum(unscaled, 0.0, out=unscaled)
+                predictions[rows] = unscaled
+                
+            except Exception as e:
+                logger.error("Prediction failed: %s", e)
+        
+        return predictions
 
 weather_ml_service = WeatherMLService()
@@ -0,0 +1,40 @@
+"""server_side_timestamps
+
+Revision ID: 12815c1c4866
+Revises: 6d7b9529f050
+Create Date: 2026-10-15 10:33:50.361477
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '12815c1c4866'
+down_revision = '6d7b9529f050'
+branch_labels = None
+depends_on = None
+
+# Naive UTC, matching what datetime.utcnow() used to write from Python
+UTC_NOW = "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+TIMESTAMP_COLUMNS = (
+    ('farmers', 'created_at'),
+    ('fields', 'created_at'),
+    ('feedback', 'ts'),
+    ('sensors', 'created_at'),
+    ('sensor_assignments', 'started_at'),
+)
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=sa.text(UTC_NOW))
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None)
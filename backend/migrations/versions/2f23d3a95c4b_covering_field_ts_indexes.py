@@ -0,0 +1,30 @@
+"""covering_field_ts_indexes
+
+Revision ID: 2f23d3a95c4b
+Revises: 32b463f20bfd
+Create Date: 2026-10-15 09:50:31.733103
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f23d3a95c4b'
+down_revision = '32b463f20bfd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_sensor_readings_field_ts', table_name='sensor_readings')
+    op.create_index('ix_sensor_readings_field_ts_cover', 'sensor_readings', ['field_id', sa.text('ts DESC')], unique=False, postgresql_include=['id', 'sensor_id', 'moisture', 'ph', 'n', 'p', 'k'])
+    op.drop_index('ix_weather_readings_field_ts', table_name='weather_readings')
+    op.create_index('ix_weather_readings_field_ts_cover', 'weather_readings', ['field_id', sa.text('ts DESC')], unique=False, postgresql_include=['id', 'temp_c', 'humidity_pct', 'rainfall_mm'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weather_readings_field_ts_cover', table_name='weather_readings', postgresql_include=['id', 'temp_c', 'humidity_pct', 'rainfall_mm'])
+    op.create_index('ix_weather_readings_field_ts', 'weather_readings', ['field_id', sa.text('ts DESC')], unique=False)
+    op.drop_index('ix_sensor_readings_field_ts_cover', table_name='sensor_readings', postgresql_include=['id', 'sensor_id', 'moisture', 'ph', 'n', 'p', 'k'])
+    op.create_index('ix_sensor_readings_field_ts', 'sensor_readings', ['field_id', sa.text('ts DESC')], unique=False)
@@ -0,0 +1,121 @@
+"""native_uuid_ids
+
+Revision ID: 324646d12b94
+Revises: 4d68f0dbe620
+Create Date: 2026-10-15 10:04:57.942561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from alembic import context
+
+
+# revision identifiers, used by Alembic.
+revision = '324646d12b94'
+down_revision = '4d68f0dbe620'
+branch_labels = None
+depends_on = None
+
+
+# Every id column, grouped per table so each table is rewritten once
+ID_COLUMNS = {
+    'farmers': ['id'],
+    'fields': ['id', 'farmer_id'],
+    'sensors': ['id'],
+    'sensor_readings': ['id', 'field_id', 'sensor_id'],
+    'weather_readings': ['id', 'field_id'],
+    'images': ['id', 'field_id'],
+    'recommendations': ['id', 'field_id'],
+    'feedback': ['id', 'field_id', 'recommendation_id'],
+    'sensor_assignments': ['id', 'sensor_id', 'field_id'],
+}
+
+# (table, column, referenced table, referenced column); constraint names are
+# PostgreSQL's defaults for the unnamed FKs created by earlier revisions.
+FOREIGN_KEYS = [
+    ('fields', 'farmer_id', 'farmers', 'id'),
+    ('sensor_readings', 'field_id', 'fields', 'id'),
+    ('sensor_readings', 'sensor_id', 'sensors', 'id'),
+    ('weather_readings', 'field_id', 'fields', 'id'),
+    ('images', 'field_id', 'fields', 'id'),
+    ('recommendations', 'field_id', 'fields', 'id'),
+    ('feedback', 'field_id', 'fields', 'id'),
+    ('feedback', 'recommendation_id', 'recommendations', 'id'),
+    ('sensor_assignments', 'sensor_id', 'sensors', 'id'),
+    ('sensor_assignments', 'field_id', 'fields', 'id'),
+]
+
+_UUID_RE = '^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$'
+
+
+def _to_uuid(column: str) -> str:
+    # Legacy hand-picked ids (e.g. "field_001" from the admin helper) map to
+    # md5(id)::uuid; applying the same expression to PKs and FKs keeps every
+    # reference pointing at the same row.
+    return f"CASE WHEN {column} ~* '{_UUID_RE}' THEN {column}::uuid ELSE md5({column})::uuid END"
+
+
+def _create_rain_rollup() -> None:
+    # Same definition and policy as the weather_timescale_rain_rollup revision
+    op.execute(
+        "CREATE MATERIALIZED VIEW weather_rain_1h WITH (timescaledb.continuous) AS "
+        "SELECT field_id, time_bucket(INTERVAL '1 hour', ts) AS bucket, sum(rainfall_mm) AS rain_mm "
+        "FROM weather_readings GROUP BY field_id, bucket WITH NO DATA"
+    )
+    op.execute('ALTER MATERIALIZED VIEW weather_rain_1h SET (timescaledb.materialized_only = false)')
+    op.execute(
+        "SELECT add_continuous_aggregate_policy('weather_rain_1h', "
+        "start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour', "
+        "schedule_interval => INTERVAL '30 minutes')"
+    )
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    online = not context.is_offline_mode()
+    # The TimescaleDB rain rollup reads weather_readings.field_id; a column
+    # used by a continuous aggregate can't change type, so rebuild it after.
+    has_rollup = online and op.get_bind().execute(
+        sa.text("SELECT to_regclass('weather_rain_1h') IS NOT NULL")
+    ).scalar()
+    if has_rollup:
+        op.execute('DROP MATERIALIZED VIEW weather_rain_1h')
+
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey')
+    for table, columns in ID_COLUMNS.items():
+        op.execute(
+            f'ALTER TABLE {table} '
+            + ', '.join(f'ALTER COLUMN {c} TYPE uuid USING {_to_uuid(c)}' for c in columns)
+        )
+    for table, column, ref_table, ref_column in FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, ref_table, [column], [ref_column])
+
+    if has_rollup:
+        _create_rain_rollup()
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    online = not context.is_offline_mode()
+    has_rollup = online and op.get_bind().execute(
+        sa.text("SELECT to_regclass('weather_rain_1h') IS NOT NULL")
+    ).scalar()
+    if has_rollup:
+        op.execute('DROP MATERIALIZED VIEW weather_rain_1h')
+
+    # Ids that were not UUIDs before the upgrade keep their md5-derived value
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey')
+    for table, columns in ID_COLUMNS.items():
+        op.execute(
+            f'ALTER TABLE {table} '
+            + ', '.join(f'ALTER COLUMN {c} TYPE varchar USING {c}::text' for c in columns)
+        )
+    for table, column, ref_table, ref_column in FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, ref_table, [column], [ref_column])
+
+    if has_rollup:
+        _create_rain_rollup()
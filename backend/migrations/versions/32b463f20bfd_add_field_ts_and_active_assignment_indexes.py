@@ -0,0 +1,30 @@
+"""add_field_ts_and_active_assignment_indexes
+
+Revision ID: 32b463f20bfd
+Revises: b52cc412805f
+Create Date: 2026-10-15 09:43:18.628374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '32b463f20bfd'
+down_revision = 'b52cc412805f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sensor_readings_field_ts', 'sensor_readings', ['field_id', sa.text('ts DESC')], unique=False)
+    op.create_index('ix_images_field_ts', 'images', ['field_id', sa.text('ts DESC')], unique=False)
+    op.create_index('ix_recommendations_field_ts', 'recommendations', ['field_id', sa.text('ts DESC')], unique=False)
+    op.create_index('ix_sensor_assignments_active_sensor', 'sensor_assignments', ['sensor_id'], unique=False, postgresql_where=sa.text('active = true'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_assignments_active_sensor', table_name='sensor_assignments', postgresql_where=sa.text('active = true'))
+    op.drop_index('ix_recommendations_field_ts', table_name='recommendations')
+    op.drop_index('ix_images_field_ts', table_name='images')
+    op.drop_index('ix_sensor_readings_field_ts', table_name='sensor_readings')
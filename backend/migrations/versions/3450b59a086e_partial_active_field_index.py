@@ -0,0 +1,27 @@
+"""partial_active_field_index
+
+Revision ID: 3450b59a086e
+Revises: 996f1cc2b6d4
+Create Date: 2026-10-15 10:19:24.152019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3450b59a086e'
+down_revision = '996f1cc2b6d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Replace the full field_id index with one over active assignments only
+    op.drop_index('ix_sensor_assignments_field_id', table_name='sensor_assignments')
+    op.create_index('ix_sensor_assignments_active_field', 'sensor_assignments', ['field_id'], unique=False, postgresql_where=sa.text('active = true'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_assignments_active_field', table_name='sensor_assignments', postgresql_where=sa.text('active = true'))
+    op.create_index('ix_sensor_assignments_field_id', 'sensor_assignments', ['field_id'], unique=False)
@@ -0,0 +1,36 @@
+"""recommendation_jsonb
+
+Revision ID: 6d7b9529f050
+Revises: 3450b59a086e
+Create Date: 2026-10-15 10:26:37.256748
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d7b9529f050'
+down_revision = '3450b59a086e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    op.execute(
+        'ALTER TABLE recommendations '
+        'ALTER COLUMN action_json TYPE jsonb USING action_json::jsonb, '
+        'ALTER COLUMN why_json TYPE jsonb USING why_json::jsonb'
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    op.execute(
+        'ALTER TABLE recommendations '
+        'ALTER COLUMN action_json TYPE json USING action_json::json, '
+        'ALTER COLUMN why_json TYPE json USING why_json::json'
+    )
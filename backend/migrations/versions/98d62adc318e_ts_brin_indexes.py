@@ -0,0 +1,36 @@
+"""ts_brin_indexes
+
+Revision ID: 98d62adc318e
+Revises: fd62c08802cf
+Create Date: 2026-10-15 10:48:16.570935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '98d62adc318e'
+down_revision = 'fd62c08802cf'
+branch_labels = None
+depends_on = None
+
+# Append-mostly time series, so rows are laid out roughly in ts order
+BRIN_TABLES = ('sensor_readings', 'weather_readings')
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for table in BRIN_TABLES:
+        op.create_index(
+            f'ix_{table}_ts_brin', table, ['ts'],
+            postgresql_using='brin', postgresql_with={'pages_per_range': 32},
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for table in BRIN_TABLES:
+        op.drop_index(f'ix_{table}_ts_brin', table_name=table)
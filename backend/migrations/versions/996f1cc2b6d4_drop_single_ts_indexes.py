@@ -0,0 +1,32 @@
+"""drop_single_ts_indexes
+
+Revision ID: 996f1cc2b6d4
+Revises: 324646d12b94
+Create Date: 2026-10-15 10:12:11.047290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '996f1cc2b6d4'
+down_revision = '324646d12b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Every time-series read filters on field_id first, which the composite
+    # (field_id, ts DESC) indexes serve; the bare ts indexes only cost writes.
+    op.drop_index('ix_sensor_readings_ts', table_name='sensor_readings')
+    op.drop_index('ix_weather_readings_ts', table_name='weather_readings')
+    op.drop_index('ix_images_ts', table_name='images')
+    op.drop_index('ix_recommendations_ts', table_name='recommendations')
+
+
+def downgrade() -> None:
+    op.create_index('ix_recommendations_ts', 'recommendations', ['ts'], unique=False)
+    op.create_index('ix_images_ts', 'images', ['ts'], unique=False)
+    op.create_index('ix_weather_readings_ts', 'weather_readings', ['ts'], unique=False)
+    op.create_index('ix_sensor_readings_ts', 'sensor_readings', ['ts'], unique=False)
@@ -0,0 +1,24 @@
+"""add_weather_field_ts_index
+
+Revision ID: b52cc412805f
+Revises: 85784f52a7f8
+Create Date: 2026-10-15 09:36:05.523645
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52cc412805f'
+down_revision = '85784f52a7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_weather_readings_field_ts', 'weather_readings', ['field_id', sa.text('ts DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weather_readings_field_ts', table_name='weather_readings')
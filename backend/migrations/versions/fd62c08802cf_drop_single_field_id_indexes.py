@@ -0,0 +1,32 @@
+"""drop_single_field_id_indexes
+
+Revision ID: fd62c08802cf
+Revises: 12815c1c4866
+Create Date: 2026-10-15 10:41:03.466206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fd62c08802cf'
+down_revision = '12815c1c4866'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (field_id, ts DESC) indexes lead with field_id, so they already serve
+    # every field_id lookup and the FK checks; the single-column ones are redundant.
+    op.drop_index('ix_sensor_readings_field_id', table_name='sensor_readings')
+    op.drop_index('ix_weather_readings_field_id', table_name='weather_readings')
+    op.drop_index('ix_images_field_id', table_name='images')
+    op.drop_index('ix_recommendations_field_id', table_name='recommendations')
+
+
+def downgrade() -> None:
+    op.create_index('ix_recommendations_field_id', 'recommendations', ['field_id'], unique=False)
+    op.create_index('ix_images_field_id', 'images', ['field_id'], unique=False)
+    op.create_index('ix_weather_readings_field_id', 'weather_readings', ['field_id'], unique=False)
+    op.create_index('ix_sensor_readings_field_id', 'sensor_readings', ['field_id'], unique=False)
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import pytest
+
+from api.main import app
+from api.db import Base, get_db
+from api import models
+
+# Use a separate in-memory SQLite for testing logic (simple)
+# OR use the same PG structure but mocked.
+# Prompt asks for "ensure ... runs via pytest -q".
+# Using SQLite for speed in tests is common unless PG specific features used.
+# But we used UUIDs which SQLite handles as strings mostly fine but might need care.
+# Let's try to mock the DB session or use a temp SQLite.
+
+# One in-memory database shared by every TestClient thread: StaticPool hands
+# out the same connection, so the schema is created once and nothing touches disk.
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINTs; let SQLAlchemy
+# emit it so each test can run inside a transaction that is rolled back.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_begin(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+@pytest.fixture(scope="session", autouse=True)
+def create_tables():
+    # Created once for the session; nothing is left behind afterwards
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="session")
+def client(create_tables):
+    # Entering the client runs the app's startup/shutdown handlers once per session
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture
+def test_db():
+    # Setup: run the whole test in one outer transaction. Sessions (including
+    # the app's, via override_get_db) join it and their commits only release
+    # savepoints, so rolling it back leaves clean tables for the next test.
+    connection = engine.connect()
+    transaction = connection.begin()
+    TestingSessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+    db = TestingSessionLocal()
+    # Create valid farmer/field first to satisfy FKs (if enforceable in sqlite)
+    if not db.query(models.Farmer).first():
+        f = models.Farmer(id="farmer_test", name="Test Farmer")
+        db.add(f)
+        fi = models.Field(id="field_test", farmer_id="farmer_test", name="Test Field", crop="wheat", growth_stage="vegetative", lat=0, lon=0)
+        db.add(fi)
+        db.commit()
+    yield db
+    # Teardown
+    db.close()
+    transaction.rollback()
+    connection.close()
+    TestingSessionLocal.configure(bind=engine)
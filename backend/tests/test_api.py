@@ -1,59 +1,8 @@
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
-import pytest
-
-from api.main import app
-from api.db import Base, get_db
-from api import models
-
-# Use a separate in-memory SQLite for testing logic (simple)
-# OR use the same PG structure but mocked.
-# Prompt asks for "ensure ... runs via pytest -q".
-# Using SQLite for speed in tests is common unless PG specific features used.
-# But we used UUIDs which SQLite handles as strings mostly fine but might need care.
-# Let's try to mock the DB session or use a temp SQLite.
-
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-client = TestClient(app)
-
-@pytest.fixture
-def test_db():
-    # Setup
-    db = TestingSessionLocal()
-    # Create valid farmer/field first to satisfy FKs (if enforceable in sqlite)
-    if not db.query(models.Farmer).first():
-        f = models.Farmer(id="farmer_test", name="Test Farmer")
-        db.add(f)
-        fi = models.Field(id="field_test", farmer_id="farmer_test", name="Test Field", crop="wheat", growth_stage="vegetative", lat=0, lon=0)
-        db.add(fi)
-        db.commit()
-    yield
-    # Teardown
-    db.close()
-
-def test_basic_flow(test_db):
+from datetime import datetime, timedelta
+
+def test_basic_flow(test_db, client):
     # 1. Create Farmer
-    res = client.post("/farmers", json={"name": "Test Farmer", "phone": "123", "language": "en"})
+    res = client.post("/farmers", json={"name": "Test Farmer", "phone": "123", "email": "testfarmer@example.com", "password": "pw", "language": "en"})
     assert res.status_code == 200
     farmer_id = res.json()["id"]
 
@@ -89,9 +38,9 @@ def test_basic_flow(test_db):
     assert data["field_id"] == field_id
     assert isinstance(data["missing_data"], list) # check it's a list even if empty
 
-def test_recommendation_rounding_and_msg(test_db):
+def test_recommendation_rounding_and_msg(test_db, client):
     # Setup farmer/field
-    f_res = client.post("/farmers", json={"name": "F", "phone": "1", "language": "en"})
+    f_res = client.post("/farmers", json={"name": "F", "phone": "1", "email": "f@example.com", "password": "pw", "language": "en"})
     fr_id = f_res.json()["id"]
     fi_res = client.post("/fields", json={"farmer_id": fr_id, "name": "Fi", "crop": "wheat", "growth_stage": "veg", "lat":0, "lon":0})
     fi_id = fi_res.json()["id"]
@@ -116,7 +65,7 @@ def test_recommendation_rounding_and_msg(test_db):
     # Logic: if sensor (+0.1), if weather (+0.1) else msg.
     # We didn't add weather, so missing weather msg.
     # Confidence = 0.6 + 0.1 = 0.7.
-    val = data["confidence"]
+    val = data["data_completeness"] # formerly "confidence"
     assert isinstance(val, float)
     # Just ensure it runs.
     
@@ -125,9 +74,9 @@ def test_recommendation_rounding_and_msg(test_db):
     # Message should be about moisture < threshold
     assert any("forecast" in w.lower() for w in data["why"])
 
-def test_phase3_endpoints(test_db):
+def test_phase3_endpoints(test_db, client):
     # Setup
-    f_res = client.post("/farmers", json={"name": "F3", "phone": "3", "language": "en"})
+    f_res = client.post("/farmers", json={"name": "F3", "phone": "3", "email": "f3@example.com", "password": "pw", "language": "en"})
     fr_id = f_res.json()["id"]
     fi_res = client.post("/fields", json={"farmer_id": fr_id, "name": "Fi3", "crop": "corn", "growth_stage": "veg", "lat":0, "lon":0})
     fi_id = fi_res.json()["id"]
@@ -159,9 +108,9 @@ def test_phase3_endpoints(test_db):
     assert fb_res.status_code == 200
     assert fb_res.json()["followed"] is True
 
-def test_browsing(test_db):
+def test_browsing(test_db, client):
     # Setup
-    f_res = client.post("/farmers", json={"name": "FB", "phone": "4", "language": "en"})
+    f_res = client.post("/farmers", json={"name": "FB", "phone": "4", "email": "fb@example.com", "password": "pw", "language": "en"})
     fr_id = f_res.json()["id"]
     fi_res = client.post("/fields", json={"farmer_id": fr_id, "name": "FiB", "crop": "corn", "growth_stage": "veg", "lat":0, "lon":0})
     fi_id = fi_res.json()["id"]
@@ -192,3 +141,245 @@ def test_browsing(test_db):
     res_weath = client.get(f"/weather_readings?field_id={fi_id}&limit=5")
     assert res_weath.status_code == 200
     assert len(res_weath.json()) >= 3
+
+def test_weather_readings_cursor_pagination(test_db, client):
+    now = datetime.utcnow()
+    # Two rows share each of the first two timestamps, as batch ingest and
+    # repeated forecast fetches produce
+    client.post("/ingest/weather/batch", json=[{
+        "field_id": "field_test",
+        "ts": (now - timedelta(hours=i // 2)).isoformat(),
+        "temp_c": 20.0 + i, "humidity_pct": 50.0, "rainfall_mm": 0.0
+    } for i in range(5)])
+
+    # Page through newest-first until the cursor header runs out
+    pages, params = [], {"field_id": "field_test", "limit": 2}
+    for _ in range(5):
+        res = client.get("/weather_readings", params=params)
+        assert res.status_code == 200
+        pages.append(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    assert [len(page) for page in pages] == [2, 2, 1]
+    temps = sorted(r["temp_c"] for page in pages for r in page)
+    assert temps == [20.0, 21.0, 22.0, 23.0, 24.0]
+    ts = [r["ts"] for page in pages for r in page]
+    assert ts == sorted(ts, reverse=True)
+
+    # Page sizes outside 1..MAX_PAGE_SIZE and malformed cursors are rejected
+    for bad in ({"limit": 0}, {"limit": -1}, {"limit": 100000}, {"cursor": "yesterday"}):
+        res = client.get("/weather_readings", params={"field_id": "field_test", **bad})
+        assert res.status_code in (400, 422)
+
+def test_training_dedupe_follows_latest_location(monkeypatch):
+    from concurrent.futures import Future
+    from api.services import tasks
+
+    submitted = []
+    class FakeExecutor:
+        def submit(self, fn, field_id, lat, lon):
+            future = Future()
+            future.set_running_or_notify_cancel()
+            submitted.append(((lat, lon), future))
+            return future
+    monkeypatch.setattr(tasks, "_executor", FakeExecutor())
+    monkeypatch.setattr(tasks, "_fields", {})
+
+    a, b = (10.0, 79.0), (11.0, 77.0)
+    assert tasks.enqueue_training("f1", *a)
+    # Moved while A trains: B waits for it rather than running alongside
+    assert tasks.enqueue_training("f1", *b)
+    assert [loc for loc, _ in submitted] == [a]
+    # ...and moving back to A drops B; the run in flight is already for A
+    assert not tasks.enqueue_training("f1", *a)
+    submitted[0][1].set_result(None)
+    assert [loc for loc, _ in submitted] == [a]
+
+    # A different location after the run is trained, even within the TTL
+    assert tasks.enqueue_training("f1", *b)
+    assert tasks.enqueue_training("f1", *a)
+    submitted[1][1].set_result(None)
+    assert [loc for loc, _ in submitted] == [a, b, a]
+
+def test_field_weather_background_task_stores_readings(test_db, client, monkeypatch):
+    from conftest import TestingSessionLocal
+    from api import main, models, schemas
+
+    async def fake_live_weather(lat, lon, field_id):
+        reading = schemas.WeatherReadingCreate(
+            field_id=field_id, ts=datetime.utcnow(), temp_c=30.0, humidity_pct=60.0, rainfall_mm=1.5
+        )
+        return reading, []
+    monkeypatch.setattr(main.weather_service, "fetch_live_weather", fake_live_weather)
+    monkeypatch.setattr(main.tasks, "enqueue_training", lambda *args: True)
+    monkeypatch.setattr(main, "SessionLocal", TestingSessionLocal)
+
+    res = client.post("/fields", json={"farmer_id": "farmer_test", "name": "Bg", "crop": "wheat", "growth_stage": "vegetative", "lat": 1.0, "lon": 2.0})
+    assert res.status_code == 200
+    field_id = res.json()["id"]
+
+    # The task ran after the response, against the test database
+    rows = test_db.query(models.WeatherReading).filter_by(field_id=field_id).all()
+    assert [r.rainfall_mm for r in rows] == [1.5]
+
+def test_snapshot_etag_not_modified_and_invalidated_by_ingest(test_db, client, monkeypatch):
+    from api import main
+    # Keep the time bucket fixed so only data changes move the ETag
+    monkeypatch.setattr(main, "SNAPSHOT_ETAG_WINDOW_S", 10**9)
+    now = datetime.utcnow()
+    weather = {"field_id": "field_test", "temp_c": 25.0, "humidity_pct": 50.0, "rainfall_mm": 0.0}
+    # A forecast row ahead of any current reading
+    client.post("/ingest/weather", json={**weather, "ts": (now + timedelta(hours=12)).isoformat()})
+
+    res = client.get("/field/field_test/latest")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = client.get("/field/field_test/latest", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+
+    # A new current reading changes the snapshot even though the forecast
+    # row is still the newest weather row overall
+    client.post("/ingest/weather", json={**weather, "ts": (now - timedelta(minutes=5)).isoformat(), "rainfall_mm": 3.0})
+    res = client.get("/field/field_test/latest", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.json()["weather"]["rainfall_mm_24h"] == 3.0
+
+def test_field_list_not_cached(test_db, client):
+    # The per-field read may be reused briefly...
+    res = client.get("/fields/field_test")
+    assert res.headers["Cache-Control"] == "private, max-age=30" and "ETag" in res.headers
+    # ...but the farmer's field list must reflect creates and edits immediately
+    res = client.get("/fields", params={"farmer_id": "farmer_test"})
+    assert res.status_code == 200
+    assert "Cache-Control" not in res.headers and "ETag" not in res.headers
+
+def _fake_weather_artifacts(biases):
+    """_get_artifacts stand-in: 'model' = bias + summed rain, identity scaling."""
+    import numpy as np
+    calls = []
+    def get_artifacts(field_id):
+        if field_id not in biases:
+            return None
+        def run(x):
+            calls.append((field_id, x.shape))
+            rain = x[:, :, 2].sum(axis=1, keepdims=True)
+            return (rain + biases[field_id] + np.arange(3)).astype(np.float32)
+        return run, np.ones(4), np.zeros(4)
+    return get_artifacts, calls
+
+def _history(*rains):
+    return [{"temp_max": 30.0, "temp_min": 25.0, "rain": r, "humidity": 60.0} for r in rains]
+
+def test_rain_forecast_batch_groups_and_order(monkeypatch):
+    from api.services.weather_ml import weather_ml_service
+    get_artifacts, calls = _fake_weather_artifacts({"a": 100.0, "b": 200.0})
+    monkeypatch.setattr(weather_ml_service, "_get_artifacts", get_artifacts)
+
+    field_ids = ["a", "missing", "b", "a"]
+    histories = [_history(1, 2, 3), _history(5), _history(1, 1), _history(4, 4, 4, 4, 4)]
+    preds = weather_ml_service.predict_next_3_days_batch(field_ids, histories)
+
+    # Rows follow the input order; an untrained field gets zeros
+    assert preds.tolist() == [
+        [106.0, 107.0, 108.0],
+        [0.0, 0.0, 0.0],
+        [202.0, 203.0, 204.0],
+        [120.0, 121.0, 122.0],
+    ]
+    # Histories of different lengths for the same field run as separate passes
+    assert sorted(calls) == [("a", (1, 3, 4)), ("a", (1, 5, 4)), ("b", (1, 2, 4))]
+    # The single-field wrapper agrees with its batch row
+    assert weather_ml_service.predict_next_3_days("b", histories[2]) == preds[2].tolist()
+
+def test_rain_forecast_endpoint(test_db, client, monkeypatch):
+    from api import main
+    monkeypatch.setattr(main.tasks, "enqueue_training", lambda *args: True)
+    fr_id = client.post("/farmers", json={"name": "R", "phone": "1", "email": "rain@example.com", "password": "pw"}).json()["id"]
+    field_ids = [
+        client.post("/fields", json={"farmer_id": fr_id, "name": f"F{i}", "crop": "rice", "growth_stage": "vegetative", "lat": 0, "lon": 0}).json()["id"]
+        for i in range(3)
+    ]
+    now = datetime.utcnow()
+    for days_ago, rain in [(3, 2.0), (2, 4.0)]:
+        client.post("/ingest/weather", json={"field_id": field_ids[0], "ts": (now - timedelta(days=days_ago)).isoformat(), "temp_c": 30.0, "humidity_pct": 60.0, "rainfall_mm": rain})
+
+    # The first and last fields are trained, but the last has no history yet
+    get_artifacts, calls = _fake_weather_artifacts({field_ids[0]: 10.0, field_ids[2]: 20.0})
+    monkeypatch.setattr(main.weather_ml_service, "_get_artifacts", get_artifacts)
+
+    res = client.get("/rain_forecast", params={"farmer_id": fr_id})
+    assert res.status_code == 200
+    data = res.json()
+    assert list(data) == field_ids
+    assert data[field_ids[0]] == [16.0, 17.0, 18.0]
+    assert data[field_ids[1]] == [0.0, 0.0, 0.0]
+    assert data[field_ids[2]] == [0.0, 0.0, 0.0]
+    assert [field_id for field_id, _ in calls] == [field_ids[0]]
+
+def test_recommendation_reasons_round_trip(test_db, client):
+    from api import models
+    client.post("/ingest/sensor", json={
+        "field_id": "field_test", "ts": datetime.utcnow().isoformat(),
+        "moisture": 10.0, "ph": 6.0, "n": 40.0, "p": 30.0, "k": 20.0
+    })
+    rec = client.post("/recommend/field_test").json()
+
+    # Stored as compact [code, *args] entries...
+    stored = test_db.get(models.Recommendation, rec["id"]).why_json
+    assert stored and all(isinstance(entry, list) and isinstance(entry[0], int) for entry in stored)
+
+    # ...a legacy row still holds the plain sentences
+    legacy = models.Recommendation(
+        field_id="field_test", ts=datetime.utcnow() - timedelta(days=30), action_json={},
+        data_completeness=0.5, why_json=["Old plain reason", "⚠️ Missing weather data (past 24h)."]
+    )
+    test_db.add(legacy)
+    test_db.commit()
+
+    # ...and both render back to text in the history
+    history = {item["id"]: item["why_json"] for item in client.get("/recommendations", params={"field_id": "field_test"}).json()}
+    assert history[rec["id"]] == rec["why"]
+    assert history[legacy.id] == ["Old plain reason", "⚠️ Missing weather data (past 24h)."]
+
+def test_recommendation_history_survives_dense_forecast(test_db, client, monkeypatch):
+    from api import main
+    monkeypatch.setattr(main.weather_ml_service, "_get_artifacts", lambda field_id: None)
+    now = datetime.utcnow()
+    weather = {"field_id": "field_test", "temp_c": 25.0, "humidity_pct": 50.0}
+    past = [{**weather, "ts": (now - timedelta(hours=6 * i + 1)).isoformat(), "rainfall_mm": 1.0} for i in range(10)]
+    # More forecast points in the next 72h than the forecast side may return
+    future = [{**weather, "ts": (now + timedelta(minutes=8 * i + 1)).isoformat(), "rainfall_mm": 0.5} for i in range(504)]
+    client.post("/ingest/weather/batch", json=past + future)
+
+    rec = client.post("/recommend/field_test").json()
+    # The forecast no longer crowds the past week out of the LSTM history...
+    assert rec["ai_history"] == [1.0] * 7
+    # ...and keeps the nearest points, oldest-first
+    forecast = rec["snapshot_used"]["weather"]["forecast_72h"]
+    assert len(forecast) == main.RECOMMENDATION_FORECAST_LIMIT
+    assert forecast[0]["ts"] == future[0]["ts"]
+    assert [pt["ts"] for pt in forecast] == sorted(pt["ts"] for pt in forecast)
+
+def test_nutrient_adequacy_batch_matches_scalar():
+    from api.crop_nutrient_standards import check_nutrient_adequacy, check_nutrient_adequacy_batch
+    # One passing row, then rows failing one, several and every check
+    # (acidic and alkaline pH both covered)
+    rows = [
+        (300, 15, 150, 6.0, 50),
+        (200, 15, 150, 6.0, 50),
+        (300, 5, 100, 7.5, 50),
+        (100, 5, 50, 4.5, 10),
+    ]
+    batch = check_nutrient_adequacy_batch("Rice", "Vegetative", *zip(*rows))
+    for i, row in enumerate(rows):
+        scalar = check_nutrient_adequacy("Rice", "Vegetative", *row)
+        for key in ("n_adequate", "p_adequate", "k_adequate", "ph_adequate", "moisture_adequate"):
+            assert batch[key][i] == scalar[key], (i, key)
+        assert batch["deficiencies"][i] == scalar["deficiencies"]
+        assert batch["all_adequate"][i] == (not scalar["deficiencies"])
+        assert batch["requirements"] is scalar["requirements"]
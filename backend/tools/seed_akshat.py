@@ -1,4 +1,6 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import random
 import json
@@ -7,6 +9,15 @@ import time
 
 # Configuration
 API_URL = os.getenv("API_URL", "http://localhost:8000")
+FIELD_WORKERS = 3    # fields seeded in parallel
+READING_WORKERS = 6  # sensor readings posted in parallel per field
+
+# One keep-alive session for every request instead of a new connection each;
+# sized so every worker thread can hold its own connection.
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=FIELD_WORKERS * READING_WORKERS)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
 
 def gen_ts(offset_hours):
     return (datetime.datetime.utcnow() + datetime.timedelta(hours=offset_hours)).isoformat()
@@ -25,7 +36,7 @@ def run_seed():
     }
     
     # Try creating (might fail if exists, but we wiped DB so it should work)
-    res = requests.post(f"{API_URL}/farmers", json=akshat_payload)
+    res = session.post(f"{API_URL}/farmers", json=akshat_payload)
     if res.status_code == 200:
         farmer_data = res.json()
         farmer_id = farmer_data['id']
@@ -34,7 +45,7 @@ def run_seed():
         # If already exists (maybe from previous attempts), login
         print("User likely exists, logging in...")
         # We need ID. Login to get it.
-        login_res = requests.post(f"{API_URL}/login", json={"email": "akshat@nomad.com", "password": "password123"})
+        login_res = session.post(f"{API_URL}/login", json={"email": "akshat@nomad.com", "password": "password123"})
         if login_res.status_code == 200:
             farmer_id = login_res.json()['farmer_id']
             print(f"✅ Logged in as: {farmer_id}")
@@ -70,77 +81,88 @@ def run_seed():
         }
     ]
 
-    for f_def in fields_to_create:
-        print(f"\nProcessing Field: {f_def['name']}...")
-        payload = {**f_def, "farmer_id": farmer_id}
-        res = requests.post(f"{API_URL}/fields", json=payload)
-        if res.status_code != 200:
-            print(f"⚠️ Failed to create field {f_def['name']}: {res.text}")
-            continue
-        
-        field_data = res.json()
-        field_id = field_data['id']
-        print(f"✅ Created Field: {field_id}")
-
-        # 3. Create & Assign Sensor (New Flow)
-        print("  Setting up Sensors...")
-        sensor_name = f"Sensor-{f_def['name'][0:3]}"
-        sensor_payload = {
-            "name": sensor_name,
-            "type": "Soil",
-            "metrics": "n,p,k,ph,moisture",
-            "status": "active"
-        }
-        sensor_res = requests.post(f"{API_URL}/sensors", json=sensor_payload)
-        if sensor_res.status_code == 200:
-            sensor_id = sensor_res.json()['id']
-            # Assign
-            requests.post(f"{API_URL}/sensors/{sensor_id}/assign", json={"sensor_id": sensor_id, "field_id": field_id})
-            # Simulate Data (ML Input)
-            print("  Simulating ML Data...")
-            requests.post(f"{API_URL}/sensors/{sensor_id}/simulate")
-            # Also add some manual history
-        else:
-            print("  ⚠️ Sensor creation failed")
-
-        print("  Ingesting Sensor Readings (Last 24h)...")
-        for i in range(12): # Every 2 hours
-            offset = -24 + (i * 2)
-            s_payload = {
-                "field_id": field_id,
-                "ts": gen_ts(offset),
-                "moisture": random.uniform(20, 60),
-                "ph": random.uniform(6.0, 7.5),
-                "n": random.uniform(30, 80),
-                "p": random.uniform(20, 50),
-                "k": random.uniform(30, 60),
-                "sensor_id": sensor_id if sensor_res.status_code == 200 else None
-            }
-            requests.post(f"{API_URL}/ingest/sensor", json=s_payload)
-
-        print("  Ingesting Sample Images...")
-        # Add a dummy image
-        img_payload = {
-            "field_id": field_id,
-            "ts": gen_ts(0),
-            "source": "mobile",
-            "rgb_url": "https://images.unsplash.com/photo-1625246333195-5840507c8879?w=600&q=80", # Generic farm image
-            "notes": "Weekly inspection"
-        }
-        requests.post(f"{API_URL}/ingest/image", json=img_payload)
-
-        # 4. Generate Recommendation
-        print("  Generating Recommendation...")
-        rec_res = requests.post(f"{API_URL}/recommend/{field_id}")
-        if rec_res.status_code == 200:
-            rec_data = rec_res.json()
-            ai_analysis = rec_data.get("ai_analysis", "N/A")
-            print(f"  ✅ Recommendation generated. AI Analysis: {ai_analysis}")
-        else:
-            print("  ⚠️ Recommendation failed.")
+    # Fields are independent of each other, so seed them concurrently
+    with ThreadPoolExecutor(max_workers=FIELD_WORKERS) as pool:
+        list(pool.map(lambda f_def: seed_field(f_def, farmer_id), fields_to_create))
 
     print("\n✅ Seed Complete for Akshat!")
     print("Credentials: akshat@nomad.com / password123")
 
+def seed_field(f_def, farmer_id):
+    # Fields run in parallel, so tag each line with the field it belongs to
+    def log(msg):
+        print(f"[{f_def['name']}] {msg}")
+
+    log("Processing Field...")
+    payload = {**f_def, "farmer_id": farmer_id}
+    res = session.post(f"{API_URL}/fields", json=payload)
+    if res.status_code != 200:
+        log(f"⚠️ Failed to create field: {res.text}")
+        return
+
+    field_data = res.json()
+    field_id = field_data['id']
+    log(f"✅ Created Field: {field_id}")
+
+    # 3. Create & Assign Sensor (New Flow)
+    log("  Setting up Sensors...")
+    sensor_name = f"Sensor-{f_def['name'][0:3]}"
+    sensor_payload = {
+        "name": sensor_name,
+        "type": "Soil",
+        "metrics": "n,p,k,ph,moisture",
+        "status": "active"
+    }
+    sensor_res = session.post(f"{API_URL}/sensors", json=sensor_payload)
+    if sensor_res.status_code == 200:
+        sensor_id = sensor_res.json()['id']
+        # Assign
+        session.post(f"{API_URL}/sensors/{sensor_id}/assign", json={"sensor_id": sensor_id, "field_id": field_id})
+        # Simulate Data (ML Input)
+        log("  Simulating ML Data...")
+        session.post(f"{API_URL}/sensors/{sensor_id}/simulate")
+        # Also add some manual history
+    else:
+        log("  ⚠️ Sensor creation failed")
+
+    log("  Ingesting Sensor Readings (Last 24h)...")
+    readings = []
+    for i in range(12): # Every 2 hours
+        offset = -24 + (i * 2)
+        readings.append({
+            "field_id": field_id,
+            "ts": gen_ts(offset),
+            "moisture": random.uniform(20, 60),
+            "ph": random.uniform(6.0, 7.5),
+            "n": random.uniform(30, 80),
+            "p": random.uniform(20, 50),
+            "k": random.uniform(30, 60),
+            "sensor_id": sensor_id if sensor_res.status_code == 200 else None
+        })
+    # Each reading is its own round-trip; overlap them
+    with ThreadPoolExecutor(max_workers=READING_WORKERS) as pool:
+        list(pool.map(lambda s_payload: session.post(f"{API_URL}/ingest/sensor", json=s_payload), readings))
+
+    log("  Ingesting Sample Images...")
+    # Add a dummy image
+    img_payload = {
+        "field_id": field_id,
+        "ts": gen_ts(0),
+        "source": "mobile",
+        "rgb_url": "https://images.unsplash.com/photo-1625246333195-5840507c8879?w=600&q=80", # Generic farm image
+        "notes": "Weekly inspection"
+    }
+    session.post(f"{API_URL}/ingest/image", json=img_payload)
+
+    # 4. Generate Recommendation
+    log("  Generating Recommendation...")
+    rec_res = session.post(f"{API_URL}/recommend/{field_id}")
+    if rec_res.status_code == 200:
+        rec_data = rec_res.json()
+        ai_analysis = rec_data.get("ai_analysis", "N/A")
+        log(f"  ✅ Recommendation generated. AI Analysis: {ai_analysis}")
+    else:
+        log("  ⚠️ Recommendation failed.")
+
 if __name__ == "__main__":
     run_seed()
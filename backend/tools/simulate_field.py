@@ -93,6 +93,7 @@ def run_simulation():
 
     # 3. Ingest Weather Readings (24 hourly over last 24h)
     print("Ingesting past weather...")
+    weather_batch = []
     for i in range(24):
         offset = -24 + i
         payload = {
@@ -102,7 +103,7 @@ def run_simulation():
             "humidity_pct": random.uniform(40.0, 80.0),
             "rainfall_mm": random.choice([0.0, 0.0, 5.0]) if i > 20 else 0.0 # Some rain recently
         }
-        requests.post(f"{API_URL}/ingest/weather", json=payload)
+        weather_batch.append(payload)
 
     # 4. Ingest Forecast (12 points for next 72h, every 6h)
     print("Ingesting weather forecast...")
@@ -115,7 +116,12 @@ def run_simulation():
             "humidity_pct": random.uniform(30.0, 60.0),
             "rainfall_mm": 0.0 # Dry forecast to trigger irrigation if dry soil
         }
-        requests.post(f"{API_URL}/ingest/weather", json=payload)
+        weather_batch.append(payload)
+
+    # Past readings and forecast go up in a single request
+    res = requests.post(f"{API_URL}/ingest/weather/batch", json=weather_batch)
+    if res.status_code != 200:
+        print(f"Failed to ingest weather: {res.text}")
 
     # 5. Ingest Images (2 metadata rows)
     print("Ingesting images...")
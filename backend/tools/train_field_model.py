@@ -35,7 +35,7 @@ def main():
         print()
         print("✅ Training complete!")
         print(f"   Model saved to: api/ml/models/model_{args.field_id}.pth")
-        print(f"   Scaler saved to: api/ml/models/scaler_{args.field_id}.joblib")
+        print(f"   Scaler saved to: api/ml/models/scaler_{args.field_id}.npz")
         print()
         print("💡 Now you can run the validation script:")
         print(f"   python tools/validate_weather_model.py --field-id {args.field_id} --lat {args.lat} --lon {args.lon}")
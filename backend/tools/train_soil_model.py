@@ -1,99 +1,67 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import os
-import random
+
+from soil_training import fit_classifier, sample_crops, save_classifier, soil_frame
 
 # --- 1. Synthetic Data Generation ---
-def generate_synthetic_data(n_samples=5000):
+def generate_synthetic_data(n_samples=5000, seed=42):
     print(f"Generating {n_samples} synthetic soil samples...")
     
-    data = []
-    crops = ["Rice", "Wheat", "Maize"]
+    # Every sample is drawn at once; no per-sample Python loop
+    rng = np.random.default_rng(seed)
+    onehot = sample_crops(rng, n_samples)
+    
+    # Generate random features (realistic ranges)
+    # Stored as float32: the forest trains on float32 anyway, so sklearn
+    # needn't make a converted copy, and the labels below are derived from
+    # exactly the values the model sees.
+    n = rng.uniform(0, 100, n_samples).astype(np.float32)  # Nitrogen mg/kg
+    p = rng.uniform(0, 100, n_samples).astype(np.float32)  # Phosphorus mg/kg
+    k = rng.uniform(0, 100, n_samples).astype(np.float32)  # Potassium mg/kg
+    ph = rng.uniform(4.0, 9.0, n_samples).astype(np.float32) # pH level
+    moisture = rng.uniform(10, 90, n_samples).astype(np.float32) # Moisture %
     
-    for _ in range(n_samples):
-        crop = random.choice(crops)
-        
-        # Generate random features (realistic ranges)
-        n = random.uniform(0, 100)  # Nitrogen mg/kg
-        p = random.uniform(0, 100)  # Phosphorus mg/kg
-        k = random.uniform(0, 100)  # Potassium mg/kg
-        ph = random.uniform(4.0, 9.0) # pH level
-        moisture = random.uniform(10, 90) # Moisture %
-        
-        # Determine Label based on Rules (Simulating an Agronomist)
-        # These rules basically "teach" the model what we know.
-        
-        status = "Healthy"
-        
+    # Determine Label based on Rules (Simulating an Agronomist)
+    # These rules basically "teach" the model what we know.
+    # np.select takes the first matching rule, like an if/elif chain, so
+    # the pH checks win over the crop-specific nutrient checks.
+    maize, rice, wheat = onehot.T.astype(bool) # CROPS order
+    rules = [
         # pH Priority
-        if ph < 5.5:
-            status = "Acidic Soil"
-        elif ph > 8.0:
-            status = "Alkaline Soil"
-        else:
-            # Nutrient checks (vary by crop slightly in reality, but simplified here)
-            # Rice needs high N
-            if crop == "Rice":
-                if n < 40: status = "Low Nitrogen"
-                elif n > 80: status = "High Nitrogen"
-                elif p < 20: status = "Low Phosphorus"
-                elif k < 20: status = "Low Potassium"
-                elif moisture < 30: status = "Low Moisture"
-            
-            # Wheat
-            elif crop == "Wheat":
-                if n < 30: status = "Low Nitrogen"
-                elif p < 20: status = "Low Phosphorus"
-                elif k < 20: status = "Low Potassium"
-            
-            # Maize
-            elif crop == "Maize":
-                if n < 50: status = "Low Nitrogen"
-                elif p < 30: status = "Low Phosphorus"
-                elif k < 30: status = "Low Potassium"
-
-        # Add noise? (Maybe later. For now, we want it to learn the rules perfectly)
-        
-        data.append({
-            "N": n,
-            "P": p,
-            "K": k,
-            "pH": ph,
-            "Moisture": moisture,
-            "Crop": crop,
-            "Status": status
-        })
-        
-    return pd.DataFrame(data)
+        (ph < 5.5, "Acidic Soil"),
+        (ph > 8.0, "Alkaline Soil"),
+        # Nutrient checks (vary by crop slightly in reality, but simplified here)
+        # Rice needs high N
+        (rice & (n < 40), "Low Nitrogen"),
+        (rice & (n > 80), "High Nitrogen"),
+        (rice & (p < 20), "Low Phosphorus"),
+        (rice & (k < 20), "Low Potassium"),
+        (rice & (moisture < 30), "Low Moisture"),
+        # Wheat
+        (wheat & (n < 30), "Low Nitrogen"),
+        (wheat & (p < 20), "Low Phosphorus"),
+        (wheat & (k < 20), "Low Potassium"),
+        # Maize
+        (maize & (n < 50), "Low Nitrogen"),
+        (maize & (p < 30), "Low Phosphorus"),
+        (maize & (k < 30), "Low Potassium"),
+    ]
+    status = np.select([cond for cond, _ in rules], [label for _, label in rules], default="Healthy")
+    
+    # Add noise? (Maybe later. For now, we want it to learn the rules perfectly)
+    
+    return soil_frame({"N": n, "P": p, "K": k, "pH": ph, "Moisture": moisture}, onehot, status)
 
 # --- 2. Model Training ---
 def train_model():
     df = generate_synthetic_data(10000)
     
-    # Preprocessing
-    # One-hot encode Crop
-    df = pd.get_dummies(df, columns=["Crop"], drop_first=False)
-    
-    # Ensure all crop columns exist even if random missed one (unlikely with 10k samples)
-    for c in ["Crop_Rice", "Crop_Wheat", "Crop_Maize"]:
-        if c not in df.columns:
-            df[c] = 0
-            
-    X = df.drop(columns=["Status"])
-    y = df["Status"]
-    
     print("\nTraining Random Forest Classifier...")
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
+    # Crop is already one-hot encoded by the generator
+    clf, y_test, preds = fit_classifier(df)
     
     # Evaluation
-    preds = clf.predict(X_test)
     acc = accuracy_score(y_test, preds)
     print(f"\nModel Accuracy: {acc:.4f}")
     print("\nClassification Report:")
@@ -104,12 +72,12 @@ def train_model():
     os.makedirs(output_dir, exist_ok=True)
     
     model_path = os.path.join(output_dir, "soil_classifier.joblib")
-    joblib.dump(clf, model_path)
+    save_classifier(clf, model_path)
     print(f"\nModel saved to: {model_path}")
     
     # Basic Feature Importance
     print("\nFeature Importances:")
-    importances = list(zip(X.columns, clf.feature_importances_))
+    importances = list(zip(clf.feature_names_in_, clf.feature_importances_))
     importances.sort(key=lambda x: x[1], reverse=True)
     for feat, imp in importances:
         print(f"{feat}: {imp:.4f}")
@@ -1,15 +1,14 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import os
-import random
+
+from soil_training import fit_classifier, sample_crops, save_classifier, soil_frame
 
 # --- Configuration ---
 DATA_FILE = os.path.join(os.path.dirname(__file__), "../data/RS_Session_257_AU_2256_1.csv")
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "../api/ml")
+CATEGORIES = ["VL", "L", "M", "H", "VH"]
 
 # Nutrient Ranges (kg/ha) and OC (%) based on Soil Health Card Scheme (India)
 # We infer VL/VH where official docs usually merge them, to match the CSV's granularity.
@@ -44,115 +43,114 @@ RANGES = {
     }
 }
 
+# CSV sample-count columns per nutrient, in CATEGORIES order
+NUTRIENT_COLS = {
+    "N": ["Nitrogen (N) - VL", "Nitrogen (N) - L", "Nitrogen (N) - M", "Nitrogen (N) - H", "Nitrogen (N) - VH"],
+    "P": ["Phosphorous (P) - VL", "Phosphorous (P) - L", "Phosphorous (P) - M", "Phosphorous (P) - H", "Phosphorous (P) - VH"],
+    "K": ["Potassium (K) - VL", "Potassium (K) - L", "Potassium (K) - M", "Potassium (K) - H", "Potassium (K) - VH"],
+    "OC": ["Organic Carbon (OC) - VL", "Organic Carbon (OC) - L", "Organic Carbon (OC) - M", "Organic Carbon (OC) - H", "Organic Carbon (OC) - VH"]
+}
+
 def load_distribution_data():
-    """Reads the CSV and calculates probability distributions per state."""
+    """
+    Reads the CSV and calculates probability distributions per state.
+    
+    Returns ({nutrient: (n_states, 5) probabilities}, states); row i of every
+    matrix belongs to states[i] and columns follow CATEGORIES.
+    """
     print(f"Loading authentic data from {DATA_FILE}...")
-    df = pd.read_csv(DATA_FILE)
+    # Only the state name and the N/P/K/OC count columns are used; skip the
+    # rest and parse the counts straight to float64 for the division below.
+    count_cols = [c for cols in NUTRIENT_COLS.values() for c in cols]
+    df = pd.read_csv(
+        DATA_FILE,
+        usecols=["State/UT", *count_cols],
+        dtype={c: np.float64 for c in count_cols},
+        na_values=["", "-", "NA"],
+    )
     
     # Filter out "Total" row
     df = df[df["State/UT"] != "Total"]
     
-    # Store probability dicts
-    # Structure: { "StateName": { "N": {"VL": 0.1, "L": 0.4...}, "P": ... } }
-    dist_map = {}
-    
-    for _, row in df.iterrows():
-        state = row["State/UT"]
-        dist_map[state] = {}
-        
-        # Process N, P, K, OC
-        nutrient_cols = {
-            "N": ["Nitrogen (N) - VL", "Nitrogen (N) - L", "Nitrogen (N) - M", "Nitrogen (N) - H", "Nitrogen (N) - VH"],
-            "P": ["Phosphorous (P) - VL", "Phosphorous (P) - L", "Phosphorous (P) - M", "Phosphorous (P) - H", "Phosphorous (P) - VH"],
-            "K": ["Potassium (K) - VL", "Potassium (K) - L", "Potassium (K) - M", "Potassium (K) - H", "Potassium (K) - VH"],
-            "OC": ["Organic Carbon (OC) - VL", "Organic Carbon (OC) - L", "Organic Carbon (OC) - M", "Organic Carbon (OC) - H", "Organic Carbon (OC) - VH"]
-        }
-        
-        categories = ["VL", "L", "M", "H", "VH"]
-        
-        for nut, cols in nutrient_cols.items():
-            counts = [float(row[c]) if not pd.isna(row[c]) else 0.0 for c in cols]
-            total = sum(counts)
-            if total > 0:
-                probs = [c / total for c in counts]
-            else:
-                # Fallback if state has no data for this nutrient (unlikely but possible)
-                probs = [0.2, 0.2, 0.2, 0.2, 0.2]
+    probs = {}
+    for nut, cols in NUTRIENT_COLS.items():
+        counts = df[cols].fillna(0.0).to_numpy()
+        totals = counts.sum(axis=1, keepdims=True)
+        # Fallback if state has no data for this nutrient (unlikely but possible)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            probs[nut] = np.where(totals > 0, counts / totals, 1.0 / len(CATEGORIES))
             
-            dist_map[state][nut] = dict(zip(categories, probs))
-            
-    return dist_map, list(dist_map.keys())
+    return probs, df["State/UT"].tolist()
+
+def _sample_categories(rng, probs, state_idx):
+    """Draw one category index (0=VL .. 4=VH) per sample from its state's row of `probs`."""
+    # Inverse-CDF sampling for all samples at once: count the CDF steps each
+    # uniform draw has passed. min() guards against the last CDF entry
+    # rounding to just under 1.0.
+    cdf = probs[state_idx].cumsum(axis=1)
+    u = rng.random(len(state_idx))
+    return np.minimum((u[:, None] >= cdf).sum(axis=1), len(CATEGORIES) - 1)
+
+def _sample_values(rng, nutrient, cat_idx):
+    """Uniform value within each sample's category range for `nutrient`.
 
-def generate_authentic_samples(n_samples=10000):
+    float32, which is what the forest trains on; sklearn then skips a
+    converted copy of the whole feature matrix.
+    """
+    lo, hi = np.array([RANGES[nutrient][c] for c in CATEGORIES]).T
+    return rng.uniform(lo[cat_idx], hi[cat_idx]).astype(np.float32)
+
+def generate_authentic_samples(n_samples=10000, seed=42):
     """Generates synthetic data based on real probability distributions."""
-    dist_map, states = load_distribution_data()
+    probs, states = load_distribution_data()
     print(f"Generating {n_samples} samples based on Govt of India data...")
     
-    data = []
-    crops = ["Rice", "Wheat", "Maize"]
+    # All samples are drawn at once; no per-sample Python loop
+    rng = np.random.default_rng(seed)
+    # 1. Pick a location (Uniformly or we could weight by state size, but uniform covers all terrain types better for ML robustness)
+    state_idx = rng.integers(0, len(states), n_samples)
     
-    for _ in range(n_samples):
-        # 1. Pick a location (Uniformly or we could weight by state size, but uniform covers all terrain types better for ML robustness)
-        state = random.choice(states)
-        probs = dist_map[state]
-        
-        # 2. Sample Nutrient Categories based on Real Stats
-        # numpy.choice is faster but we need keys/values
-        
-        cats = ["VL", "L", "M", "H", "VH"]
-        
-        # Sample N
-        n_cat = random.choices(cats, weights=list(probs["N"].values()))[0]
-        n_val = random.uniform(*RANGES["N"][n_cat])
-        
-        # Sample P
-        p_cat = random.choices(cats, weights=list(probs["P"].values()))[0]
-        p_val = random.uniform(*RANGES["P"][p_cat])
-        
-        # Sample K
-        k_cat = random.choices(cats, weights=list(probs["K"].values()))[0]
-        k_val = random.uniform(*RANGES["K"][k_cat])
-        
-        # Sample OC (Affects pH conceptually but we simulate pH separately)
-        # Using pH range 4.5 to 8.5 typical
-        ph_val = random.uniform(5.0, 8.5) 
-        
-        # Moisture (Weather dependent, not soil inherent usually, but part of model input)
-        moisture_val = random.uniform(10, 90)
-        
-        crop = random.choice(crops)
-        
-        # 3. Assign Label (The "Expert" Decision)
-        # We use the generated VALUES to determine the label, ensuring consistency.
-        status = "Healthy"
-        
-        # Rule Hierarchy (matches the CSV categories intuitively)
-        # Low N/P/K/OC -> Deficient
-        
-        if n_cat in ["VL", "L"]:
-            status = "Low Nitrogen"
-        elif p_cat in ["VL", "L"]:
-            status = "Low Phosphorus"
-        elif k_cat in ["VL", "L"]:
-            status = "Low Potassium"
-        elif ph_val < 5.5:
-            status = "Acidic Soil"
-        elif ph_val > 8.0:
-            status = "Alkaline Soil"
-        elif moisture_val < 30:
-            status = "Low Moisture"
-            
-        data.append({
-            "N": n_val,
-            "P": p_val,
-            "K": k_val,
-            "pH": ph_val,
-            "Moisture": moisture_val,
-            "Crop": crop,
-            "Status": status
-        })
-        
-    return pd.DataFrame(data)
+    # 2. Sample Nutrient Categories based on Real Stats, then values within them
+    n_cat = _sample_categories(rng, probs["N"], state_idx)
+    p_cat = _sample_categories(rng, probs["P"], state_idx)
+    k_cat = _sample_categories(rng, probs["K"], state_idx)
+    n_val = _sample_values(rng, "N", n_cat)
+    p_val = _sample_values(rng, "P", p_cat)
+    k_val = _sample_values(rng, "K", k_cat)
+    
+    # Sample OC (Affects pH conceptually but we simulate pH separately)
+    # Using pH range 4.5 to 8.5 typical
+    # float32 like the nutrient values, so labels use what the model sees
+    ph_val = rng.uniform(5.0, 8.5, n_samples).astype(np.float32)
+    
+    # Moisture (Weather dependent, not soil inherent usually, but part of model input)
+    moisture_val = rng.uniform(10, 90, n_samples).astype(np.float32)
+    
+    onehot = sample_crops(rng, n_samples)
+    
+    # 3. Assign Label (The "Expert" Decision)
+    # We use the generated VALUES to determine the label, ensuring consistency.
+    # Rule Hierarchy (matches the CSV categories intuitively)
+    # Low N/P/K/OC -> Deficient
+    # np.select takes the first matching rule, like an if/elif chain. It
+    # picks small integer codes (0 = Healthy, i = rules[i-1]) rather than
+    # label strings; they're decoded once, into the categorical Status column.
+    low = CATEGORIES.index("L") # VL or L
+    rules = [
+        (n_cat <= low, "Low Nitrogen"),
+        (p_cat <= low, "Low Phosphorus"),
+        (k_cat <= low, "Low Potassium"),
+        (ph_val < 5.5, "Acidic Soil"),
+        (ph_val > 8.0, "Alkaline Soil"),
+        (moisture_val < 30, "Low Moisture"),
+    ]
+    labels = ["Healthy"] + [label for _, label in rules]
+    status = np.select([cond for cond, _ in rules], np.arange(1, len(labels), dtype=np.int8), default=0)
+    
+    return soil_frame(
+        {"N": n_val, "P": p_val, "K": k_val, "pH": ph_val, "Moisture": moisture_val},
+        onehot, status, labels,
+    )
 
 def train_model():
     df = generate_authentic_samples(10000)
@@ -161,32 +159,18 @@ def train_model():
     print("\nGenerated Data Distribution:")
     print(df["Status"].value_counts())
     
-    # Preprocessing
-    df = pd.get_dummies(df, columns=["Crop"], drop_first=False)
-    
-    # Ensure columns
-    for c in ["Crop_Rice", "Crop_Wheat", "Crop_Maize"]:
-        if c not in df.columns:
-            df[c] = 0
-            
-    X = df.drop(columns=["Status"])
-    y = df["Status"]
-    
     print("\nTraining Random Forest Classifier on Authentic Distributions...")
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
+    # Crop is already one-hot encoded by the generator
+    clf, y_test, preds = fit_classifier(df)
     
     # Evaluation
-    preds = clf.predict(X_test)
     acc = accuracy_score(y_test, preds)
     print(f"\nModel Accuracy: {acc:.4f}")
     
     # Save
     os.makedirs(MODEL_DIR, exist_ok=True)
     model_path = os.path.join(MODEL_DIR, "soil_classifier.joblib")
-    joblib.dump(clf, model_path)
+    save_classifier(clf, model_path)
     print(f"\n✅ Authentic Model saved to: {model_path}")
 
 if __name__ == "__main__":
@@ -12,8 +12,12 @@ Usage:
     
     Or to validate all existing models:
     python tools/validate_weather_model.py --all
+
+    Add --no-plot to skip the comparison figure (e.g. on CI).
 """
 
+import asyncio
+import functools
 import sys
 import os
 import argparse
@@ -23,12 +27,32 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import matplotlib
+# Without a terminal (CI, servers) there's nobody to show a window to: render
+# off-screen and only save the figure
+INTERACTIVE = sys.stdout.isatty()
+if not INTERACTIVE:
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from api.services.weather_ml import WeatherMLService
-import glob
+from sklearn.metrics import r2_score
+import torch
+from api.ml.lstm import LSTMWeatherModel
+from api.services.weather_ml import WeatherMLService, load_scaler
+
+# Every field's model shares this architecture (upgraded parameters), so one
+# module is built and each field's weights are passed in at call time
+_MODEL = LSTMWeatherModel(input_size=4, hidden_size=64, num_layers=3).eval()
+
+# Keyed by path, so validating several fields (or one field again) in the same
+# process reuses the already loaded artifacts
+@functools.lru_cache(maxsize=32)
+def _load_weights(path: str) -> dict:
+    return torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+
+_load_scaler = functools.lru_cache(maxsize=32)(load_scaler)
 
-def validate_model(field_id: str, lat: float, lon: float):
+def validate_model(field_id: str, lat: float, lon: float, plot: bool = True):
     """
     Validate a single model by testing on recent historical data.
     
@@ -36,6 +60,7 @@ def validate_model(field_id: str, lat: float, lon: float):
         field_id: ID of the field
         lat: Latitude
         lon: Longitude
+        plot: Whether to render and save the comparison figure
     
     Returns:
         Dictionary with validation metrics
@@ -50,7 +75,7 @@ def validate_model(field_id: str, lat: float, lon: float):
     # Step 1: Fetch historical data (2 years)
     print("⏳ Fetching historical weather data...")
     try:
-        df = service._fetch_historical_data(lat, lon, years=2)
+        df = asyncio.run(service._fetch_historical_data(lat, lon, years=2))
         print(f"✅ Fetched {len(df)} days of historical data")
     except Exception as e:
         print(f"❌ Error fetching data: {e}")
@@ -70,12 +95,10 @@ def validate_model(field_id: str, lat: float, lon: float):
     print(f"   Testing:  {len(test_df)} days")
     
     # Step 3: Load the trained model
-    from api.ml.lstm import LSTMWeatherModel
-    import torch
-    import joblib
-    
     model_path = f"api/ml/models/model_{field_id}.pth"
-    scaler_path = f"api/ml/models/scaler_{field_id}.joblib"
+    scaler_path = f"api/ml/models/scaler_{field_id}.npz"
+    if not os.path.exists(scaler_path):
+        scaler_path = f"api/ml/models/scaler_{field_id}.joblib"
     
     if not os.path.exists(model_path):
         print(f"❌ Model not found at {model_path}")
@@ -83,49 +106,32 @@ def validate_model(field_id: str, lat: float, lon: float):
         return None
     
     print(f"\n🤖 Loading trained model...")
-    # Use upgraded architecture parameters
-    model = LSTMWeatherModel(input_size=4, hidden_size=64, num_layers=3)
-    model.load_state_dict(torch.load(model_path))
-    model.eval()
-    
-    scaler = joblib.load(scaler_path)
+    weights = _load_weights(model_path)
+    scale, offset = _load_scaler(scaler_path)
     print("✅ Model and scaler loaded")
     
     # Step 4: Make predictions on test data
     print(f"\n🔮 Generating predictions...")
-    predictions = []
-    actuals = []
-    
-    # Use a sliding window over test data
-    for i in range(len(test_df) - 10):  # Need 7 days history + 3 days future
-        # Get 7 days of history
-        history = test_df.iloc[i:i+7]
-        
-        # Get actual next 3 days
-        actual_next_3 = test_df.iloc[i+7:i+10]['rain'].values
-        
-        if len(actual_next_3) < 3:
-            break
-        
-        # Prepare input
-        history_scaled = scaler.transform(history[['temp_max', 'temp_min', 'rain', 'humidity']])
-        input_tensor = torch.FloatTensor(history_scaled).unsqueeze(0)
-        
-        # Predict
-        with torch.no_grad():
-            pred_scaled = model(input_tensor).numpy()[0]
-        
-        # Inverse transform
-        dummy = np.zeros((3, 4))
-        dummy[:, 2] = pred_scaled
-        pred_actual = scaler.inverse_transform(dummy)[:, 2]
-        pred_actual = np.maximum(0, pred_actual)  # Clip negatives
-        
-        predictions.append(pred_actual)
-        actuals.append(actual_next_3)
-    
-    predictions = np.array(predictions)
-    actuals = np.array(actuals)
+    # Sliding windows over test data: 7 days history + 3 days future each.
+    # All windows go through the model in one batched forward pass.
+    n_windows = len(test_df) - 10
+    # Strided views into test_df: no per-window slices or copies
+    histories = sliding_window_view(test_df, (7, 4))[:n_windows, 0] # (N, 7, 4)
+    actuals = sliding_window_view(test_df[7:, 2], 3)[:n_windows] # (N, 3)
+    
+    # Prepare input: one scaled copy of the windows, offset added in place
+    histories_scaled = histories * scale
+    histories_scaled += offset
+    input_tensor = torch.from_numpy(histories_scaled).float()
+    
+    # Predict
+    with torch.inference_mode():
+        pred_scaled = torch.func.functional_call(_MODEL, weights, (input_tensor,)).numpy()
+    
+    # Inverse transform into a single float64 result array, as the service does
+    predictions = np.subtract(pred_scaled, offset[2], dtype=np.float64)
+    predictions /= scale[2]
+    np.maximum(predictions, 0.0, out=predictions)  # Clip negatives
     
     print(f"✅ Generated {len(predictions)} 3-day predictions")
     
@@ -137,16 +143,16 @@ def validate_model(field_id: str, lat: float, lon: float):
     pred_flat = predictions.flatten()
     actual_flat = actuals.flatten()
     
-    mae = mean_absolute_error(actual_flat, pred_flat)
-    rmse = np.sqrt(mean_squared_error(actual_flat, pred_flat))
+    # Residuals computed once; overall and per-day metrics are reductions of them
+    err = predictions - actuals
+    abs_err = np.abs(err)
+    sq_err = err * err
+    mae = abs_err.mean()
+    rmse = np.sqrt(sq_err.mean())
     r2 = r2_score(actual_flat, pred_flat)
     
     # Calculate per-day metrics
-    day_metrics = []
-    for day in range(3):
-        day_mae = mean_absolute_error(actuals[:, day], predictions[:, day])
-        day_rmse = np.sqrt(mean_squared_error(actuals[:, day], predictions[:, day]))
-        day_metrics.append((day_mae, day_rmse))
+    day_metrics = list(zip(abs_err.mean(axis=0), np.sqrt(sq_err.mean(axis=0))))
     
     print(f"   Overall MAE:  {mae:.2f} mm  (Mean Absolute Error)")
     print(f"   Overall RMSE: {rmse:.2f} mm  (Root Mean Squared Error)")
@@ -173,6 +179,16 @@ def validate_model(field_id: str, lat: float, lon: float):
     else:
         print("   🔴 Weak predictive power (R² < 0.4)")
     
+    result = {
+        'mae': mae,
+        'rmse': rmse,
+        'r2': r2,
+        'day_metrics': day_metrics,
+        'num_predictions': len(predictions)
+    }
+    if not plot:
+        return result
+    
     # Step 6: Generate visualization
     print(f"\n📊 Generating visualization...")
     
@@ -181,7 +197,9 @@ def validate_model(field_id: str, lat: float, lon: float):
     
     # Plot 1: Actual vs Predicted (scatter)
     ax1 = axes[0, 0]
-    ax1.scatter(actual_flat, pred_flat, alpha=0.5, s=30)
+    # A couple of thousand points look the same and render much faster
+    step = max(1, len(actual_flat) // 2000)
+    ax1.scatter(actual_flat[::step], pred_flat[::step], alpha=0.5, s=30)
     ax1.plot([actual_flat.min(), actual_flat.max()], 
              [actual_flat.min(), actual_flat.max()], 
              'r--', lw=2, label='Perfect Prediction')
@@ -257,29 +275,28 @@ def validate_model(field_id: str, lat: float, lon: float):
     print(f"✅ Visualization saved to: {output_path}")
     
     # Show plot
-    plt.show()
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     
-    return {
-        'mae': mae,
-        'rmse': rmse,
-        'r2': r2,
-        'day_metrics': day_metrics,
-        'num_predictions': len(predictions)
-    }
+    return result
 
 
 def find_existing_models():
     """Find all existing trained models."""
-    model_pattern = "api/ml/models/model_*.pth"
-    model_files = glob.glob(model_pattern)
-    
-    field_ids = []
-    for model_file in model_files:
-        # Extract field_id from filename: model_<field_id>.pth
-        field_id = Path(model_file).stem.replace('model_', '')
-        field_ids.append(field_id)
-    
-    return field_ids
+    # One directory read; file names are model_<field_id>.pth (the quantized
+    # model_<field_id>_int8.pth copies belong to the same fields)
+    try:
+        with os.scandir("api/ml/models") as entries:
+            return [
+                entry.name[len("model_"):-len(".pth")]
+                for entry in entries
+                if entry.name.startswith("model_")
+                and entry.name.endswith(".pth")
+                and not entry.name.endswith("_int8.pth")
+            ]
+    except FileNotFoundError:
+        return []
 
 
 def main():
@@ -288,9 +305,14 @@ def main():
     parser.add_argument('--lat', type=float, help='Latitude of the field')
     parser.add_argument('--lon', type=float, help='Longitude of the field')
     parser.add_argument('--all', action='store_true', help='Validate all existing models')
+    parser.add_argument('--no-plot', action='store_true', help='Skip the comparison figure')
     
     args = parser.parse_args()
     
+    # One forward pass at a time: let the intra-op pool have every core and
+    # don't start a second (inter-op) pool competing with it
+    torch.set_num_interop_threads(1)
+    
     if args.all:
         print("🔍 Searching for existing models...")
         field_ids = find_existing_models()
@@ -311,7 +333,7 @@ def main():
             print(f"   - {fid}")
         
     elif args.field_id and args.lat and args.lon:
-        result = validate_model(args.field_id, args.lat, args.lon)
+        result = validate_model(args.field_id, args.lat, args.lon, plot=not args.no_plot)
         
         if result:
             print(f"\n{'='*60}")